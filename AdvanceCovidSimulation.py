@@ -1,10 +1,16 @@
-import matplotlib.pyplot as plt
-from matplotlib import rcParams
-import pandas as pd
+import logging
+import numpy as np
 import random
 import pygame
 import pymunk
-import sys
+
+from Counters import Counters
+from Engine import Engine
+from Log import throttled_logger
+from Physics import Disc, DiscSpace
+from Renderer import DirtyRects, color_surface
+from Scheduler import Scheduler
+from SpatialGrid import SpatialGrid
 
 
 # Constants
@@ -14,35 +20,42 @@ FPS = 60
 BLACK, WHITE, RED, GREEN, BLUE, GREY = (
     0, 0, 0), (255, 255, 255), (255, 0, 0), (0, 255, 0), (0, 0, 255), (100, 100, 100)
 BLOB_SIZE, BLOB_RADIUS = 10, 5
+# Compartments, in the order of the history columns
+HEALTHY, INFECTED, RECOVERED, DEAD = range(4)
+
+# Progress lines, at most one per second
+logger = throttled_logger(__name__)
 
 
 class Blob(pygame.sprite.Sprite):
-    def __init__(self, x, y, width, height, color, velocity, mortality_rate, recovery_time, radius=BLOB_RADIUS):
+    def __init__(self, x, y, width, height, color, velocity, mortality_rate, recovery_time, radius=BLOB_RADIUS, luck=None, body=None):
         super(Blob, self).__init__()
-        self.body = pymunk.Body()
-        self.body.position = (x, y)
-        self.body.velocity = velocity
-        self.shape = pymunk.Circle(self.body, radius)
-        self.shape.density = 1
-        self.shape.elasticity = 1
-
-        self.image = pygame.Surface([width, height])
-        self.image.fill(color)
+        if body is None:
+            self.body = pymunk.Body()
+            self.body.position = (x, y)
+            self.body.velocity = velocity
+            self.shape = pymunk.Circle(self.body, radius)
+            self.shape.density = 1
+            self.shape.elasticity = 1
+        else:
+            # Disc of the built-in NumPy engine, it has no separate shape
+            self.body = body
+            self.shape = None
+
+        self.image = color_surface(color, width, height)
         self.rect = self.image.get_rect()
         self.rect.center = [x, y]
 
         self.velocity = velocity
-        self.dead = False
         self.infected = False
-        self.infected_time = 0
-        self.luck = random.random()
+        self.luck = random.random() if luck is None else luck
         self.mortality_rate = mortality_rate
         self.recovery_time = recovery_time
 
     def respawn(self, color):
         if color == RED:
             self.infected = True
-        self.image.fill(color)
+        self.image = color_surface(color, *self.rect.size)
         return self
 
     def move(self):
@@ -52,14 +65,26 @@ class Blob(pygame.sprite.Sprite):
 
     def update(self):
         self.move()
-        if self.infected:
-            if self.infected_time <= self.recovery_time and self.luck * self.infected_time <= self.mortality_rate:
-                self.infected_time += 1
-            elif self.infected_time > self.recovery_time:
-                self.infected = False
-                self.infected_time = 0
-            else:
-                self.dead = True
+
+    def outcome(self):
+        """(ticks, dies): how many ticks after its infection the blob recovers or dies.
+
+        Day t of the infection is fatal when luck * t > mortality_rate, for the
+        first t up to recovery_time. Otherwise the blob recovers once t passed
+        recovery_time. The tick of the infection itself is not counted.
+        """
+        last = self.recovery_time
+        if last < 0:
+            return 1, False
+        if self.luck * last <= self.mortality_rate:
+            return last + 2, False
+        # First fatal t, estimated then corrected to the exact float comparison
+        t = min(max(int(self.mortality_rate // self.luck) + 1, 0), last) if self.luck > 0 else 0
+        while t > 0 and self.luck * (t - 1) > self.mortality_rate:
+            t -= 1
+        while self.luck * t <= self.mortality_rate:
+            t += 1
+        return t + 1, True
 
 
 class Wall:
@@ -69,33 +94,87 @@ class Wall:
         self.shape.elasticity = 1
 
 
-class Simulation:
-    def __init__(self, population_size, infected_ratio, mortality_rate, recovery_time, simulation_time):
+class Simulation(Engine):
+    def __init__(self, population_size, infected_ratio, mortality_rate, recovery_time, simulation_time, headless=False, history_interval=1, history_size=None, history_path=None, seed=None, profiler=None, physics="pymunk", speed=1, render_fps=FPS, max_frame_ticks=1000, dirty=False, checkpoint_path=None, checkpoint_interval=None, trace=False, trace_size=None, transmission=None):
+        # Constructor arguments, saved with every checkpoint to rebuild the simulation
+        self.parameters = {name: value for name, value in locals().items() if name not in ("self", "profiler")}
+        # "pymunk" or "numpy" for the built-in vectorized elastic disc engine
+        self.physics = physics
         self.population_size = population_size
         self.infected_ratio = infected_ratio
+        self.FPS = FPS
         self.recovery_time = recovery_time * FPS
         self.mortality_rate = mortality_rate * self.recovery_time
         self.simulation_time = simulation_time * FPS
+        self.setup(headless=headless, profiler=profiler, seed=seed, speed=speed, render_fps=render_fps,
+                   max_frame_ticks=max_frame_ticks, dirty=dirty, checkpoint_path=checkpoint_path,
+                   checkpoint_interval=checkpoint_interval, trace=trace, trace_size=trace_size,
+                   transmission=transmission, contact_size=BLOB_SIZE,
+                   history_interval=history_interval, history_size=history_size, history_path=history_path)
 
         self.bar_length = HIGHT
         self.ratio = self.population_size / self.bar_length
 
     def initialize(self):
-        # Setting up Pygame
-        pygame.init()
-        self.font = pygame.font.SysFont("timesnewroman", 22)
-        self.screen = pygame.display.set_mode(SIZE)
-        self.clock = pygame.time.Clock()
-        pygame.display.set_caption("Simulation")
-
-        # Setting pymunk
-        self.space = pymunk.Space()
+        # Setting up Pygame (headless runs never open a window)
+        if not self.headless:
+            pygame.init()
+            self.font = pygame.font.SysFont("timesnewroman", 22)
+            self.screen = pygame.display.set_mode(SIZE)
+            self.clock = pygame.time.Clock()
+            pygame.display.set_caption("Simulation")
+            self.dirty_rects = DirtyRects(self.screen, BLACK) if self.dirty else None
 
         # Containers
+        # Recoveries and deaths are scheduled at infection, only the due ones are visited
+        self.scheduler = Scheduler()
         self.blobs_infected = pygame.sprite.Group()
         self.blobs_healthy = pygame.sprite.Group()
         self.blobs_recovered = pygame.sprite.Group()
 
+        self.space = self.make_space()
+
+        # Creating the blobs, every random value drawn in one batch
+        healthy = int(self.population_size - self.population_size * self.infected_ratio)
+        n = healthy + int(self.population_size * self.infected_ratio)
+        x = self.rng.integers(0, WIDTH, n, endpoint=True).tolist()
+        y = self.rng.integers(0, HIGHT, n, endpoint=True).tolist()
+        velocity = self.rng.integers(-100, 100, (n, 2), endpoint=True).tolist()
+        recovery_time = self.rng.integers(
+            self.recovery_time - (5 * FPS), self.recovery_time, n, endpoint=True).tolist()
+        luck = self.rng.random(n).tolist()
+        for i in range(n):
+            blob = Blob(x[i], y[i],
+                        BLOB_SIZE, BLOB_SIZE, WHITE if i < healthy else RED,
+                        tuple(velocity[i]),
+                        self.mortality_rate,
+                        recovery_time[i],
+                        luck=luck[i],
+                        body=self.space.body(x[i], y[i], velocity[i]) if self.physics == "numpy" else None)
+            self.space.add(blob.body, blob.shape)
+            blob.id = i
+            if i < healthy:
+                self.blobs_healthy.add(blob)
+            else:
+                # Never infected through a contact, these recover on the first tick
+                self.blobs_infected.add(blob)
+                self.scheduler.schedule(0, (blob, False))
+        self.start_trace([blob.id for blob in self.blobs_infected], [blob.rect.x for blob in self.blobs_infected],
+                         [blob.rect.y for blob in self.blobs_infected])
+
+        self.history = self.make_history(["Day", "Healthy", "Infected", "Recovered", "Dead"])
+        # Blobs per compartment, only changed by the transitions themselves
+        self.counters = Counters((len(self.blobs_healthy), len(self.blobs_infected), 0, 0), case=INFECTED)
+        self.history.append((0, *self.counters.counts))
+
+    def make_space(self):
+        if self.physics == "numpy":
+            # Built-in engine, the walls are the edges of its box
+            return DiscSpace(WIDTH, HIGHT, BLOB_RADIUS, capacity=self.population_size)
+
+        # Setting pymunk
+        space = pymunk.Space()
+
         # Creating the walls
         walls = []
         walls.append(Wall((0, 0), (WIDTH, 0)))
@@ -103,36 +182,8 @@ class Simulation:
         walls.append(Wall((WIDTH, 0), (WIDTH, HIGHT)))
         walls.append(Wall((0, HIGHT), (WIDTH, HIGHT)))
         for wall in walls:
-            self.space.add(wall.body, wall.shape)
-
-        # Creating the blobs
-        for _ in range(int(self.population_size - self.population_size * self.infected_ratio)):
-            blob = Blob(random.randint(0, WIDTH),
-                        random.randint(0, HIGHT),
-                        BLOB_SIZE, BLOB_SIZE, WHITE,
-                        (random.randint(-100, 100), random.randint(-100, 100)),
-                        self.mortality_rate,
-                        random.randint(self.recovery_time - (5 * FPS), self.recovery_time))
-            self.space.add(blob.body, blob.shape)
-            self.blobs_healthy.add(blob)
-
-        for _ in range(int(self.population_size * self.infected_ratio)):
-            blob = Blob(random.randint(0, WIDTH),
-                        random.randint(0, HIGHT),
-                        BLOB_SIZE, BLOB_SIZE, RED,
-                        (random.randint(-100, 100), random.randint(-100, 100)),
-                        self.mortality_rate,
-                        random.randint(self.recovery_time - (5 * FPS), self.recovery_time))
-            self.space.add(blob.body, blob.shape)
-            self.blobs_infected.add(blob)
-
-        self.history = {
-            "Day": [0],
-            "Healthy": [len(self.blobs_healthy)],
-            "Infected": [len(self.blobs_infected)],
-            "Recovered": [len(self.blobs_recovered)],
-            "Dead": [0]
-        }
+            space.add(wall.body, wall.shape)
+        return space
 
     def update(self):
         self.blobs_infected.update()
@@ -140,106 +191,205 @@ class Simulation:
         self.blobs_recovered.update()
 
     def check_collision(self):
-        for collision in pygame.sprite.groupcollide(self.blobs_healthy, self.blobs_infected, True, False):
+        if self.transmission is not None:
+            collisions, infectors = self.transmit(self.blobs_healthy, self.blobs_infected, HEALTHY)
+        else:
+            grid = SpatialGrid(BLOB_SIZE, self.blobs_infected)
+            collisions = grid.groupcollide(self.blobs_healthy)
+            # The infector is the overlapping infected blob of lowest id
+            infectors = [min(blob.id for blob in grid.colliding(collision))
+                         for collision in collisions] if self.trace is not None else None
+        if self.trace is not None:
+            self.trace.record(self.tick, infectors, [blob.id for blob in collisions],
+                              [blob.rect.x for blob in collisions], [blob.rect.y for blob in collisions])
+        for collision in collisions:
+            collision.kill()
             self.blobs_infected.add(collision.respawn(RED))
+            ticks, dies = collision.outcome()
+            self.scheduler.schedule(ticks, (collision, dies))
+        self.counters.move(HEALTHY, INFECTED, len(collisions))
 
     def check_recovery(self):
-        for infected in self.blobs_infected:
-            if not infected.infected:
-                self.blobs_recovered.add(infected.respawn(GREEN))
-                self.blobs_infected.remove(infected)
-            if infected.dead:
+        for infected, dies in self.scheduler.advance():
+            if dies:
                 self.space.remove(infected.body)
                 infected.kill()
+                self.counters.move(INFECTED, DEAD)
+            else:
+                self.blobs_recovered.add(infected.respawn(GREEN))
+                self.blobs_infected.remove(infected)
+                self.counters.move(INFECTED, RECOVERED)
 
     def show_bar(self):
         healthy_bar = pygame.Rect(
-            WIDTH, 0, 20, self.history["Healthy"][-1] // self.ratio)
+            WIDTH, 0, 20, self.history.latest["Healthy"] // self.ratio)
         pygame.draw.rect(self.screen, WHITE, healthy_bar)
 
         infected_bar = pygame.Rect(
-            WIDTH, healthy_bar.bottom, 20, self.history["Infected"][-1] // self.ratio)
+            WIDTH, healthy_bar.bottom, 20, self.history.latest["Infected"] // self.ratio)
         pygame.draw.rect(self.screen, RED, infected_bar)
 
         recovered_bar = pygame.Rect(
-            WIDTH, infected_bar.bottom, 20, self.history["Recovered"][-1] // self.ratio)
+            WIDTH, infected_bar.bottom, 20, self.history.latest["Recovered"] // self.ratio)
         pygame.draw.rect(self.screen, GREEN, recovered_bar)
 
         pygame.draw.rect(self.screen, GREY, pygame.Rect(
             WIDTH, 0, 20, self.bar_length), 6)
 
     def draw(self):
+        if self.dirty_rects is not None:
+            self.dirty_rects.draw(self.blobs_infected, self.blobs_healthy, self.blobs_recovered)
+            bar = pygame.Rect(WIDTH, 0, 20, self.bar_length)
+            self.screen.fill(BLACK, bar)
+            self.show_bar()
+            self.dirty_rects.mark(bar)
+            return
+
         self.screen.fill(BLACK)
         self.blobs_infected.draw(self.screen)
         self.blobs_healthy.draw(self.screen)
         self.blobs_recovered.draw(self.screen)
         self.show_bar()
 
+    def record(self, day):
+        self.counters.record(day // FPS)
+        self.history.append((day // FPS, *self.counters.counts))
+
     def stat(self, day):
-        self.history["Day"].append(day // FPS)
-        self.history["Healthy"].append(len(self.blobs_healthy))
-        self.history["Infected"].append(len(self.blobs_infected))
-        self.history["Recovered"].append(len(self.blobs_recovered))
-        self.history["Dead"].append(self.population_size - (
-            len(self.blobs_healthy) + len(self.blobs_infected) + len(self.blobs_recovered)))
-
-        print("="*20)
-        print(
-            f"Dead ratio: {1-(len(self.blobs_healthy) + len(self.blobs_infected) + len(self.blobs_recovered))/self.population_size:.2%}")
-        print(
-            f"Healthy ratio: {len(self.blobs_healthy)/self.population_size:.2%}")
-        print(
-            f"Infected ratio: {len(self.blobs_infected)/self.population_size:.2%}")
-        print(
-            f"Recovered ratio: {len(self.blobs_recovered)/self.population_size:.2%}")
-        print("="*20)
-
-    def show_graph(self):
-        df = pd.DataFrame(self.history)
-        df.groupby("Day").mean().plot()
-        plt.title("Overview of the simulation")
-        plt.grid(True)
-        plt.style.use("ggplot")
-        plt.show()
-
-    def run(self):
-        # Initialize the simulation
+        # Throttled by the logger, the arguments are only formatted when a line is emitted
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        healthy, infected, recovered, dead = self.counters.counts
+        logger.info(
+            "Day %d | dead %.2f%% | healthy %.2f%% | infected %.2f%% | recovered %.2f%% | cases %d (+%d today)",
+            day // FPS,
+            100 * dead / self.population_size,
+            100 * healthy / self.population_size,
+            100 * infected / self.population_size,
+            100 * recovered / self.population_size,
+            self.counters.cases,
+            self.counters.new_cases[-1])
+
+    def step(self):
+        # Movement
+        self.update()
+        self.lap("update")
+
+        # Check for collision
+        self.check_collision()
+        self.lap("collision")
+
+        # Check for recovery
+        self.check_recovery()
+        self.lap("recovery")
+
+        # One fixed physics step
+        self.space.step(1/FPS)
+        self.lap("physics")
+
+    def frame(self):
+        # Drawing to the screen
+        self.draw()
+        self.draw_profiler((WIDTH - 10, HIGHT - 10))
+        self.lap("draw")
+
+        # Stats
+        self.stat(self.tick)
+        self.lap("stats")
+        return None if self.dirty_rects is None else self.dirty_rects.flush()
+
+    def get_state(self):
+        state = {
+            "simulation": type(self).__name__,
+            "parameters": self.parameters,
+            "tick": self.tick,
+            "speed": self.speed,
+            "rng": self.rng.bit_generator.state,
+            "blobs": self.blobs(),
+            "counters": self.counters.get_state(),
+            "history": self.history.get_state(),
+        }
+        if self.trace is not None:
+            state["trace"] = self.trace.get_state()
+        # The numpy engine resumes bit-identically, pymunk bodies are restored
+        # exactly but not the solver's contact cache, so those runs drift apart
+        if self.physics == "numpy":
+            state["space"] = self.space.get_state()
+        return state
+
+    def set_state(self, state):
         self.initialize()
-
-        # The main loop
-        for day in range(self.simulation_time):
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.stop()
-
-            # Movement
-            self.update()
-
-            # Check for collision
-            self.check_collision()
-
-            # Check for recovery
-            self.check_recovery()
-
-            # Drawing to the screen
-            self.draw()
-
-            # Stats
-            self.stat(day)
-
-            pygame.display.update()
-            self.clock.tick(FPS)
-            self.space.step(1/FPS)
-
-        self.stop()
-
-    def stop(self):
-        pygame.quit()
-        self.show_graph()
-        sys.exit()
+        self.space = self.make_space()
+        if self.physics == "numpy":
+            self.space.set_state(state["space"])
+        self.set_blobs(state["blobs"])
+        self.tick = state["tick"]
+        self.speed = state["speed"]
+        self.rng.bit_generator.state = state["rng"]
+        self.counters.set_state(state["counters"])
+        self.history.set_state(state["history"])
+        if self.trace is not None and "trace" in state:
+            self.trace.set_state(state["trace"])
+        self.restored = True
+
+    def blobs(self):
+        # Every living blob group by group in iteration order, with its body
+        groups = ((HEALTHY, self.blobs_healthy), (INFECTED, self.blobs_infected), (RECOVERED, self.blobs_recovered))
+        blobs = [(state, blob) for state, group in groups for blob in group]
+        # Scheduled outcome of the infected: ticks left (-1 when none) and whether it is death
+        outcome = {blob: (tick - self.scheduler.now, dies)
+                   for tick, events in self.scheduler.calendar.items() for blob, dies in events}
+        columns = {
+            "id": np.array([blob.id for _, blob in blobs], dtype=np.int64),
+            "state": np.array([state for state, _ in blobs], dtype=np.uint8),
+            "x": np.array([blob.rect.x for _, blob in blobs], dtype=np.int64),
+            "y": np.array([blob.rect.y for _, blob in blobs], dtype=np.int64),
+            "velocity": np.array([blob.velocity for _, blob in blobs], dtype=np.int64).reshape(-1, 2),
+            "infected": np.array([blob.infected for _, blob in blobs], dtype=bool),
+            "outcome": np.array([outcome.get(blob, (-1, False))[0] for _, blob in blobs], dtype=np.int64),
+            "dies": np.array([outcome.get(blob, (-1, False))[1] for _, blob in blobs], dtype=bool),
+            "luck": np.array([blob.luck for _, blob in blobs], dtype=np.float64),
+            "recovery_time": np.array([blob.recovery_time for _, blob in blobs], dtype=np.int64),
+        }
+        if self.physics == "numpy":
+            columns["disc"] = np.array([blob.body.index for _, blob in blobs], dtype=np.int64)
+        else:
+            columns["position"] = np.array([tuple(blob.body.position) for _, blob in blobs]).reshape(-1, 2)
+            columns["body_velocity"] = np.array([tuple(blob.body.velocity) for _, blob in blobs]).reshape(-1, 2)
+            columns["angle"] = np.array([blob.body.angle for _, blob in blobs])
+            columns["angular_velocity"] = np.array([blob.body.angular_velocity for _, blob in blobs])
+        return columns
+
+    def set_blobs(self, columns):
+        groups = {HEALTHY: (self.blobs_healthy, WHITE), INFECTED: (self.blobs_infected, RED),
+                  RECOVERED: (self.blobs_recovered, GREEN)}
+        for group, _ in groups.values():
+            group.empty()
+        self.scheduler = Scheduler()
+        for i, state in enumerate(columns["state"].tolist()):
+            group, color = groups[state]
+            velocity = tuple(columns["velocity"][i].tolist())
+            body = Disc(self.space, int(columns["disc"][i])) if self.physics == "numpy" else None
+            blob = Blob(0, 0, BLOB_SIZE, BLOB_SIZE, color, velocity, self.mortality_rate,
+                        int(columns["recovery_time"][i]), luck=float(columns["luck"][i]), body=body)
+            blob.rect.topleft = int(columns["x"][i]), int(columns["y"][i])
+            blob.id = int(columns["id"][i])
+            blob.infected = bool(columns["infected"][i])
+            # Column order is the order of infection, due events keep it
+            if columns["outcome"][i] >= 0:
+                self.scheduler.schedule(int(columns["outcome"][i]), (blob, bool(columns["dies"][i])))
+            if body is None:
+                blob.body.position = tuple(columns["position"][i].tolist())
+                blob.body.velocity = tuple(columns["body_velocity"][i].tolist())
+                blob.body.angle = float(columns["angle"][i])
+                blob.body.angular_velocity = float(columns["angular_velocity"][i])
+                self.space.add(blob.body, blob.shape)
+            group.add(blob)
 
 
 if __name__ == '__main__':
+    from matplotlib import rcParams
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     rcParams["figure.figsize"] = 12, 8
     sim = Simulation(
         population_size=500,
@@ -0,0 +1,45 @@
+import numpy as np
+
+
+def int_dtype(low, high):
+    """Smallest signed integer dtype holding every value in [low, high]."""
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def bytes_per_agent(engine):
+    """Bytes of agent columns per agent of a struct-of-arrays engine."""
+    columns = [getattr(engine, name) for name in engine.COLUMNS]
+    return sum(column.nbytes for column in columns) / max(len(columns[0]), 1)
+
+
+class Agent:
+    """One agent of a struct-of-arrays engine seen as an object.
+
+    Attributes read and write the engine's COLUMNS at the agent's index, the
+    proxy itself is two slots and no __dict__, so one can be made on demand
+    for any of millions of agents without copying them out of the arrays.
+    """
+
+    __slots__ = ("engine", "index")
+
+    def __init__(self, engine, index):
+        object.__setattr__(self, "engine", engine)
+        object.__setattr__(self, "index", index)
+
+    def __getattr__(self, name):
+        if name not in self.engine.COLUMNS:
+            raise AttributeError(f"agents have no column {name!r}")
+        return getattr(self.engine, name)[self.index].tolist()
+
+    def __setattr__(self, name, value):
+        if name not in self.engine.COLUMNS:
+            raise AttributeError(f"agents have no column {name!r}")
+        getattr(self.engine, name)[self.index] = value
+
+    def __repr__(self):
+        columns = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.engine.COLUMNS)
+        return f"Agent({self.index}, {columns})"
@@ -0,0 +1,562 @@
+import argparse
+import math
+import time
+import os
+
+
+# Rendered benchmarks still need a video driver on display-less machines
+if "DISPLAY" not in os.environ:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+
+def headless(population_size=800, ticks=600):
+    import CovidSimulation as covid
+
+    def make(headless):
+        sim = covid.Simulation(
+            population_size=population_size,
+            initial_infected=1,
+            initial_suspected=5,
+            simulation_time=ticks,
+            recovery_time=10,
+            FPS=1,
+            headless=headless
+        )
+        sim.initialize()
+        return sim
+
+    # Headless: movement, collision, recovery and history only
+    sim = make(True)
+    start = time.perf_counter()
+    for day in range(ticks):
+        sim.step()
+        sim.record(day)
+    headless_rate = ticks / (time.perf_counter() - start)
+    sim.stop()
+
+    # Rendered: same steps plus drawing, text and display flips (no limiter)
+    sim = make(False)
+    sim.show_panel()
+    start = time.perf_counter()
+    for day in range(ticks):
+        sim.step()
+        sim.record(day)
+        sim.draw()
+        sim.stats(day)
+        covid.pygame.display.update([sim.world] + sim.hud.flush())
+    rendered_rate = ticks / (time.perf_counter() - start)
+    covid.pygame.quit()
+
+    print(f"population: {population_size}, ticks: {ticks}")
+    print(f"{'headless':<12}{headless_rate:>12.1f} steps/s")
+    print(f"{'rendered':<12}{rendered_rate:>12.1f} steps/s (capped at FPS when run interactively)")
+    print(f"{'speedup':<12}{headless_rate / rendered_rate:>12.2f}x")
+
+
+def engine(populations=(1000, 10000, 100000), ticks=60):
+    import CovidSimulation as covid
+
+    print(f"{'population':>12}{'sprite':>16}{'numpy':>16}")
+    for population_size in populations:
+        rates = []
+        for simulation in (covid.Simulation, covid.ArraySimulation):
+            sim = simulation(
+                population_size=population_size,
+                initial_infected=1,
+                initial_suspected=5,
+                simulation_time=ticks,
+                FPS=1,
+                headless=True
+            )
+            sim.initialize()
+            start = time.perf_counter()
+            for day in range(ticks):
+                sim.update()
+            rates.append(ticks / (time.perf_counter() - start))
+        print(f"{population_size:>12}{rates[0]:>12.1f} t/s{rates[1]:>12.1f} t/s")
+
+
+def collision(populations=(1000, 10000, 100000), infected_ratio=0.01):
+    import numpy as np
+    import pygame
+    import CovidSimulation as covid
+    from SpatialGrid import SpatialGrid, grid_contacts
+
+    print(f"{'population':>12}{'groupcollide':>16}{'grid':>16}{'grid (numpy)':>16}")
+    for population_size in populations:
+        infected_size = max(1, int(population_size * infected_ratio))
+        x = np.random.randint(0, covid.WIDTH, population_size)
+        y = np.random.randint(0, covid.HIGHT, population_size)
+        blobs = [covid.Blob(x[i], y[i], covid.BLOB_SIZE, covid.BLOB_SIZE, covid.WHITE, 1, (0, 1))
+                 for i in range(population_size)]
+        healthy = pygame.sprite.Group(blobs[infected_size:])
+        infected = pygame.sprite.Group(blobs[:infected_size])
+
+        start = time.perf_counter()
+        expected = pygame.sprite.groupcollide(healthy, infected, False, False)
+        brute = time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = SpatialGrid(covid.BLOB_SIZE, infected).groupcollide(healthy)
+        grid = time.perf_counter() - start
+        assert set(found) == set(expected)
+
+        x = np.array([blob.rect.x for blob in blobs])
+        y = np.array([blob.rect.y for blob in blobs])
+        start = time.perf_counter()
+        indices = grid_contacts(x, y, np.arange(infected_size, population_size),
+                                np.arange(infected_size), covid.BLOB_SIZE)
+        vectorized = time.perf_counter() - start
+        assert len(indices) == len(expected)
+
+        print(f"{population_size:>12}{brute * 1000:>13.1f} ms{grid * 1000:>13.1f} ms{vectorized * 1000:>13.1f} ms")
+
+
+def memory(population_size=2000, ticks=3000, samples=6, tolerance=64 * 1024):
+    import tracemalloc
+    import CovidSimulation as covid
+    from Renderer import SURFACES
+
+    sim = covid.Simulation(
+        population_size=population_size,
+        initial_infected=1,
+        initial_suspected=1,
+        recovery_time=400,
+        simulation_time=ticks,
+        FPS=1,
+        headless=True
+    )
+    sim.initialize()
+    # Short warm-up so the colour surfaces and grid buckets exist, the outbreak
+    # itself (every state transition) happens while memory is traced
+    for _ in range(10):
+        sim.step()
+
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+    sizes = []
+    for _ in range(samples):
+        for _ in range(ticks // samples):
+            sim.step()
+        stats = tracemalloc.take_snapshot().compare_to(baseline, "filename")
+        sizes.append(sum(stat.size_diff for stat in stats))
+    tracemalloc.stop()
+
+    print(f"population: {population_size}, ticks: {ticks}, counts: {sim.counts()}")
+    print(f"colour surfaces allocated: {len(SURFACES)}")
+    for i, size in enumerate(sizes, 1):
+        print(f"tick {i * ticks // samples:>6}: {size / 1024:>10.1f} KiB since warm-up")
+    # The state groups grow their tables while the outbreak spreads, once it has
+    # settled memory must stay flat for the rest of the run
+    settled = sizes[samples // 2:]
+    growth = max(settled) - min(settled)
+    assert growth < tolerance, f"memory grew by {growth} bytes during the run"
+    print(f"flat: growth {growth / 1024:.1f} KiB < {tolerance / 1024:.0f} KiB")
+
+
+def physics(populations=(1000, 5000, 20000), ticks=30, seed=0):
+    import numpy as np
+    import pymunk
+    import AdvanceCovidSimulation as advance
+    from Physics import DiscSpace
+
+    def energy(velocities):
+        return 0.5 * float(np.sum(np.square(velocities)))
+
+    print(f"{'population':>12}{'pymunk':>16}{'numpy':>16}{'energy drift':>28}")
+    for population_size in populations:
+        rng = np.random.default_rng(seed)
+        x = rng.integers(0, advance.WIDTH, population_size)
+        y = rng.integers(0, advance.HIGHT, population_size)
+        velocity = rng.integers(-100, 100, (population_size, 2), endpoint=True)
+
+        space = pymunk.Space()
+        for start, end in (((0, 0), (advance.WIDTH, 0)), ((0, 0), (0, advance.HIGHT)),
+                           ((advance.WIDTH, 0), (advance.WIDTH, advance.HIGHT)),
+                           ((0, advance.HIGHT), (advance.WIDTH, advance.HIGHT))):
+            wall = advance.Wall(start, end)
+            space.add(wall.body, wall.shape)
+        bodies = []
+        for i in range(population_size):
+            blob = advance.Blob(int(x[i]), int(y[i]), advance.BLOB_SIZE, advance.BLOB_SIZE,
+                                advance.WHITE, tuple(velocity[i].tolist()), 0, 0, luck=0)
+            space.add(blob.body, blob.shape)
+            bodies.append(blob.body)
+        before = energy([body.velocity for body in bodies])
+        start = time.perf_counter()
+        for _ in range(ticks):
+            space.step(1 / advance.FPS)
+        pymunk_rate = ticks / (time.perf_counter() - start)
+        pymunk_drift = energy([body.velocity for body in bodies]) / before - 1
+
+        discs = DiscSpace(advance.WIDTH, advance.HIGHT, advance.BLOB_RADIUS, capacity=population_size)
+        discs.add(*[discs.body(x[i], y[i], velocity[i]) for i in range(population_size)])
+        start = time.perf_counter()
+        for _ in range(ticks):
+            discs.step(1 / advance.FPS)
+        numpy_rate = ticks / (time.perf_counter() - start)
+        numpy_drift = energy(discs.velocity[:population_size]) / before - 1
+
+        print(f"{population_size:>12}{pymunk_rate:>12.1f} t/s{numpy_rate:>12.1f} t/s"
+              f"{pymunk_drift:>14.2%}{numpy_drift:>14.2%}")
+
+
+def render(populations=(1000, 10000, 100000), frames=10):
+    import CovidSimulation as covid
+
+    print(f"{'population':>12}{'Group.draw':>16}{'surfarray':>16}")
+    for population_size in populations:
+        times = []
+        for simulation in (covid.Simulation, covid.ArraySimulation):
+            sim = simulation(population_size=population_size, initial_infected=100,
+                             initial_suspected=100, simulation_time=1, FPS=1, seed=0)
+            sim.initialize()
+            start = time.perf_counter()
+            for _ in range(frames):
+                sim.draw()
+            times.append((time.perf_counter() - start) / frames)
+        covid.pygame.quit()
+        print(f"{population_size:>12}{times[0] * 1000:>13.2f} ms{times[1] * 1000:>13.2f} ms")
+
+
+def dirty(populations=(100, 800, 5000), frames=120):
+    import CovidSimulation as covid
+
+    # Frame time (draw, stats and display update, steps excluded) and the share
+    # of the window passed to display.update, full repaint against dirty rects
+    print(f"{'engine':<18}{'population':>12}{'full':>12}{'dirty':>12}{'updated':>10}")
+    for simulation in (covid.Simulation, covid.ArraySimulation):
+        for population_size in populations:
+            times, updated = [], 0
+            for mode in (False, True):
+                sim = simulation(population_size=population_size, initial_infected=1,
+                                 initial_suspected=5, simulation_time=frames, seed=0, dirty=mode)
+                sim.initialize()
+                sim.show_panel()
+                window = sim.width * (sim.hight + sim.stat_size)
+                elapsed, area = 0.0, 0
+                for day in range(frames):
+                    sim.step()
+                    sim.record(day)
+                    start = time.perf_counter()
+                    sim.draw()
+                    sim.stats(day)
+                    rects = sim.changed() + sim.hud.flush()
+                    covid.pygame.display.update(rects)
+                    elapsed += time.perf_counter() - start
+                    area += sum(rect.width * rect.height for rect in map(covid.pygame.Rect, rects))
+                times.append(elapsed / frames)
+                updated = area / frames / window
+            covid.pygame.quit()
+            print(f"{simulation.__name__:<18}{population_size:>12}"
+                  f"{times[0] * 1000:>9.3f} ms{times[1] * 1000:>9.3f} ms{updated:>10.1%}")
+
+
+def simai(populations=(5, 1000, 5000), nb_food=1000, ticks=300):
+    import SimAI
+
+    # Ticks per second of the sprite and batched SimAI engines, same seed and scores
+    print(f"{'players':>10}{'sprites':>16}{'arrays':>16}{'same scores':>14}")
+    for population_size in populations:
+        rates, scores = [], []
+        for simulation in (SimAI.Simulation, SimAI.ArraySimulation):
+            sim = simulation(height=1080, width=720, runtime=1, population_size=population_size,
+                             nb_food=nb_food, seed=0)
+            sim.initialize()
+            start = time.perf_counter()
+            for _ in range(ticks):
+                sim.update()
+                sim.check_collision()
+            rates.append(ticks / (time.perf_counter() - start))
+            scores.append(sim.scores())
+        SimAI.pygame.quit()
+        print(f"{population_size:>10}{rates[0]:>10.0f} tick/s{rates[1]:>10.0f} tick/s{str(scores[0] == scores[1]):>14}")
+
+
+def env(num_envs=16, steps=500, workers=(0, 2, 4)):
+    import numpy as np
+    from Environment import VectorEnvironment
+
+    # Environment steps per second of the SimAI environments, in process and in subprocesses
+    rng = np.random.default_rng(0)
+    print(f"{'workers':>8}{'envs':>8}{'env steps/s':>14}")
+    for count in workers:
+        vector = VectorEnvironment(num_envs, workers=count)
+        vector.reset(seed=0)
+        actions = rng.integers(0, 9, (steps, num_envs, 1))
+        start = time.perf_counter()
+        for action in actions:
+            vector.step(action)
+        rate = num_envs * steps / (time.perf_counter() - start)
+        vector.close()
+        print(f"{count:>8}{num_envs:>8}{rate:>14.0f}")
+
+
+def checkpoint(populations=(1000, 10000, 100000), ticks=120, path="benchmark.npz"):
+    import CovidSimulation as covid
+
+    # Save / load time and size of a snapshot, and whether the resumed run matches
+    print(f"{'engine':<18}{'population':>12}{'save':>12}{'load':>12}{'size':>12}{'identical':>11}")
+    for simulation in (covid.Simulation, covid.ArraySimulation):
+        for population_size in populations:
+            if simulation is covid.Simulation and population_size > 10000:
+                continue
+            options = dict(population_size=population_size, initial_infected=10, initial_suspected=10,
+                           simulation_time=2 * ticks, FPS=1, seed=0, headless=True)
+            reference = simulation(**options)
+            reference.initialize()
+            reference = reference.run_headless().frame()
+
+            sim = simulation(**options)
+            sim.initialize()
+            for _ in range(ticks):
+                sim.advance()
+            start = time.perf_counter()
+            sim.save(path)
+            saved = time.perf_counter() - start
+            start = time.perf_counter()
+            resumed = simulation.load(path)
+            loaded = time.perf_counter() - start
+            identical = resumed.run_headless().frame().equals(reference)
+            print(f"{simulation.__name__:<18}{population_size:>12}{saved * 1000:>9.1f} ms{loaded * 1000:>9.1f} ms"
+                  f"{os.path.getsize(path) / 1024:>9.0f} kB{str(identical):>11}")
+    os.remove(path)
+
+
+def recovery(populations=(1000, 10000, 100000), ticks=120):
+    import CovidSimulation as covid
+
+    # Everyone infected, recoveries spread over the run: the scheduler visits the
+    # blobs due this tick, the per-tick countdown visited every infected blob
+    print(f"{'population':>12}{'countdown':>16}{'scheduler':>16}{'events':>10}")
+    for population_size in populations:
+        sim = covid.Simulation(population_size=population_size, initial_infected=population_size,
+                               initial_suspected=0, recovery_time=ticks, FPS=1, headless=True, seed=0)
+        sim.initialize()
+        blobs = list(sim.infected)
+        for i, blob in enumerate(blobs):
+            blob.to_recovery = i % ticks
+
+        start = time.perf_counter()
+        for _ in range(ticks):
+            for blob in blobs:
+                blob.to_recovery += 1
+            recovered = [blob for blob in blobs if blob.to_recovery >= ticks]
+        countdown = (time.perf_counter() - start) / ticks
+
+        sim.scheduler = covid.Scheduler()
+        for i, blob in enumerate(blobs):
+            sim.scheduler.schedule(ticks - i % ticks, blob)
+        start = time.perf_counter()
+        events = 0
+        for _ in range(ticks):
+            events += len(sim.scheduler.advance())
+        scheduler = (time.perf_counter() - start) / ticks
+
+        print(f"{population_size:>12}{countdown * 1000:>13.3f} ms{scheduler * 1000:>13.3f} ms{events / ticks:>10.0f}")
+
+
+def tiled(population_size=200000, ticks=60, workers=(1, 2, 4)):
+    import CovidSimulation as covid
+    from TiledSimulation import TiledSimulation
+
+    def run(simulation, **options):
+        sim = simulation(population_size=population_size, initial_infected=10, initial_suspected=10,
+                         simulation_time=ticks, FPS=1, headless=True, seed=0, **options)
+        sim.initialize()
+        start = time.perf_counter()
+        history = sim.run_headless().frame()
+        return history, ticks / (time.perf_counter() - start)
+
+    expected, rate = run(covid.ArraySimulation)
+    print(f"cores: {os.cpu_count()}, population: {population_size}")
+    print(f"{'single process':>16}{rate:>12.1f} t/s")
+    for count in workers:
+        history, rate = run(TiledSimulation, workers=count)
+        assert history.equals(expected), "tiled run differs from the single-process run"
+        print(f"{f'{count} workers':>16}{rate:>12.1f} t/s")
+
+
+def startup(modules=("CovidSimulation", "AdvanceCovidSimulation", "SimAI", "Game", "Sweep"), repeat=3):
+    import subprocess
+    import sys
+
+    # A fresh interpreter per import, like a sweep worker. "eager" also imports the
+    # plotting and table libraries every script used to load at the top
+    probe = ("import resource, sys, time\n"
+             "start = time.perf_counter()\n"
+             "import {imports}\n"
+             "elapsed = time.perf_counter() - start\n"
+             "print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)")
+    environment = {**os.environ, "PYGAME_HIDE_SUPPORT_PROMPT": "1"}
+
+    def measure(imports):
+        runs = [subprocess.run([sys.executable, "-c", probe.format(imports=imports)], env=environment,
+                               cwd=os.path.dirname(os.path.abspath(__file__)),
+                               capture_output=True, text=True, check=True).stdout.split()
+                for _ in range(repeat)]
+        return min(float(elapsed) for elapsed, _ in runs), min(int(rss) for _, rss in runs) / 1024
+
+    print(f"{'module':<24}{'lazy':>12}{'eager':>12}{'lazy RSS':>14}{'eager RSS':>14}")
+    for module in modules:
+        lazy, lazy_rss = measure(module)
+        eager, eager_rss = measure(f"{module}, matplotlib.pyplot, pandas")
+        print(f"{module:<24}{lazy * 1000:>9.0f} ms{eager * 1000:>9.0f} ms{lazy_rss:>10.1f} MiB{eager_rss:>10.1f} MiB")
+
+
+def agents(populations=(10000, 1000000), sprites=10000):
+    import tracemalloc
+    import CovidSimulation as covid
+    from Agents import bytes_per_agent
+
+    def traced(simulation, population_size):
+        sim = simulation(population_size=population_size, initial_infected=10, initial_suspected=10,
+                         simulation_time=1, FPS=1, headless=True, seed=0)
+        tracemalloc.start()
+        sim.initialize()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return sim, size / population_size
+
+    # Everything the engine allocates for its agents, the columns alone for the array engine
+    print(f"{'engine':<18}{'population':>12}{'traced':>16}{'columns':>16}")
+    _, size = traced(covid.Simulation, sprites)
+    print(f"{'Simulation':<18}{sprites:>12}{size:>10.0f} B/agent")
+    for population_size in populations:
+        sim, size = traced(covid.ArraySimulation, population_size)
+        columns = bytes_per_agent(sim)
+        print(f"{'ArraySimulation':<18}{population_size:>12}{size:>10.1f} B/agent{columns:>10.1f} B/agent")
+        assert columns == 8, f"{columns} bytes of columns per agent"
+
+
+def trace(populations=(10000, 100000), ticks=60, repeat=3):
+    import CovidSimulation as covid
+
+    # Same seed with and without the transmission log, alternated so both see the same
+    # machine: the runs must not differ, only by the time spent recording who infected whom
+    def run(population_size, **options):
+        sim = covid.ArraySimulation(population_size=population_size, initial_infected=10, initial_suspected=0,
+                                    recovery_time=ticks, simulation_time=ticks, FPS=1, headless=True, seed=0,
+                                    **options)
+        sim.initialize()
+        start = time.perf_counter()
+        history = sim.run_headless().frame()
+        return sim, history, time.perf_counter() - start
+
+    print(f"{'population':>12}{'untraced':>14}{'traced':>14}{'overhead':>10}{'events':>10}")
+    for population_size in populations:
+        untraced = traced = float("inf")
+        for _ in range(repeat):
+            sim, history, elapsed = run(population_size, trace=True)
+            traced = min(traced, elapsed)
+            _, expected, elapsed = run(population_size)
+            untraced = min(untraced, elapsed)
+            assert history.equals(expected), "tracing changed the run"
+        print(f"{population_size:>12}{ticks / untraced:>10.1f} t/s{ticks / traced:>10.1f} t/s"
+              f"{traced / untraced - 1:>9.1%}{len(sim.trace):>10}")
+
+
+def transmission(populations=(10000, 100000), ticks=30, model=None):
+    import CovidSimulation as covid
+
+    model = model or {"probability": 0.5, "radius": 20, "kernel": "gaussian", "susceptibility": [1.0, 0.5]}
+
+    def simulation(population_size, **options):
+        sim = covid.ArraySimulation(population_size=population_size, initial_infected=population_size // 10,
+                                    initial_suspected=0, recovery_time=ticks, simulation_time=ticks, FPS=1,
+                                    headless=True, seed=0, **options)
+        sim.initialize()
+        return sim
+
+    def rate(sim):
+        start = time.perf_counter()
+        sim.run_headless()
+        return ticks / (time.perf_counter() - start)
+
+    # Whole runs with the overlap rule and with the model, then the pairs of the
+    # first tick weighed in one batch against a kernel and a draw per pair in Python
+    print(f"{'population':>12}{'overlap':>14}{'model':>14}{'pairs':>10}{'batch':>12}{'per pair':>12}")
+    for population_size in populations:
+        overlap = rate(simulation(population_size))
+        sim = simulation(population_size, transmission=model)
+        candidates, sources, distance = sim.pairs(covid.HEALTHY, covid.INFECTED, sim.transmission.radius)
+
+        start = time.perf_counter()
+        sim.transmission.infect(sim.rng, candidates, sources, distance, covid.HEALTHY)
+        batch = time.perf_counter() - start
+
+        start = time.perf_counter()
+        infected = set()
+        factor = model["probability"] * model["susceptibility"][covid.HEALTHY]
+        for candidate, d in zip(candidates.tolist(), distance.tolist()):
+            if sim.rng.random() < factor * math.exp(-4.5 * (d / model["radius"]) ** 2):
+                infected.add(candidate)
+        loop = time.perf_counter() - start
+
+        print(f"{population_size:>12}{overlap:>10.1f} t/s{rate(sim):>10.1f} t/s{len(candidates):>10}"
+              f"{batch * 1000:>9.2f} ms{loop * 1000:>9.2f} ms")
+
+
+def world(populations=(10000, 100000, 1000000), size=100000, frames=60):
+    import CovidSimulation as covid
+    from Agents import bytes_per_agent
+
+    # A city-sized world seen through a window-sized view, at its corner as it opens
+    # and in its middle. Culled frames draw what the sparse tiles find in view, the
+    # full ones hand every agent to the renderer, clipped to the window. Moving the
+    # agents is not part of the frame
+    print(f"world: {size} x {size}")
+    print(f"{'population':>12}{'view':>8}{'full':>12}{'culled':>12}{'in view':>10}{'tiles':>10}{'columns':>14}")
+    for population_size in populations:
+        sim = covid.ArraySimulation(population_size=population_size, initial_infected=10, initial_suspected=0,
+                                    simulation_time=frames, world=(size, size), seed=0)
+        sim.initialize()
+        renderer = sim.renderer(covid.BLOB_SIZE)
+        for view, corner in (("corner", 0), ("middle", size / 2)):
+            sim.viewport.left = sim.viewport.top = corner
+            sim.viewport.clamp()
+            full = culled = 0.0
+            for _ in range(frames):
+                sim.move()
+                sim.tick += 1
+
+                start = time.perf_counter()
+                x, y = sim.viewport.to_screen(sim.x, sim.y)
+                renderer.draw(sim.screen, x, y, sim.state, sim.world)
+                full += time.perf_counter() - start
+
+                start = time.perf_counter()
+                sim.draw()
+                culled += time.perf_counter() - start
+            shown = len(sim.cull(*sim.viewport.bounds()))
+            print(f"{population_size:>12}{view:>8}{full / frames * 1000:>9.2f} ms{culled / frames * 1000:>9.2f} ms"
+                  f"{shown:>10}{len(sim.sparse_tiles):>10}{bytes_per_agent(sim):>8.1f} B/agent")
+        covid.pygame.quit()
+
+
+BENCHMARKS = {
+    "headless": headless,
+    "engine": engine,
+    "collision": collision,
+    "memory": memory,
+    "physics": physics,
+    "render": render,
+    "dirty": dirty,
+    "simai": simai,
+    "env": env,
+    "checkpoint": checkpoint,
+    "recovery": recovery,
+    "tiled": tiled,
+    "startup": startup,
+    "agents": agents,
+    "trace": trace,
+    "transmission": transmission,
+    "world": world,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simulation benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark]()
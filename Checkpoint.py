@@ -0,0 +1,61 @@
+import json
+import os
+
+import numpy as np
+
+FORMAT = 1
+
+
+def flatten(state, prefix, arrays, meta):
+    # Arrays become entries of the archive, everything else goes to one JSON document
+    for key, value in state.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            flatten(value, f"{name}/", arrays, meta)
+        elif isinstance(value, np.ndarray):
+            arrays[name] = value
+        else:
+            meta[name] = value
+
+
+def unflatten(items):
+    state = {}
+    for name, value in items:
+        *parents, key = name.split("/")
+        node = state
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[key] = value
+    return state
+
+
+def scalar(value):
+    # NumPy scalars in the JSON document
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} can't be saved in a checkpoint")
+
+
+def save(path, state, compress=True):
+    """Write a nested dict of arrays and JSON values as one .npz archive.
+
+    The archive is written next to `path` and moved over it once complete, so a
+    crash while saving leaves the previous checkpoint intact.
+    """
+    arrays, meta = {}, {"format": FORMAT}
+    flatten(state, "", arrays, meta)
+    arrays["meta"] = np.array(json.dumps(meta, default=scalar))
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        (np.savez_compressed if compress else np.savez)(file, **arrays)
+    os.replace(temporary, path)
+
+
+def load(path):
+    """The nested dict given to save(path, state)."""
+    with np.load(path, allow_pickle=False) as archive:
+        meta = json.loads(archive["meta"].item())
+        if meta.pop("format") != FORMAT:
+            raise ValueError(f"{path} is not a checkpoint of format {FORMAT}")
+        arrays = [(name, archive[name]) for name in archive.files if name != "meta"]
+    return unflatten(list(meta.items()) + arrays)
@@ -0,0 +1,51 @@
+import numpy as np
+
+
+class Counters:
+    """Agents per compartment, changed only when agents move between compartments.
+
+    Every move into the `case` compartment is a new case: `cases` is the
+    cumulative incidence and `new_cases[day]` the cases of every day, the
+    agents that start in `case` counting as cases of day 0. Cases are assigned
+    to a day by record(day), called once per tick after the transitions.
+    """
+
+    def __init__(self, counts, case):
+        self.counts = list(counts)
+        self.case = case
+        self.cases = self.counts[case]
+        self.new_cases = [0]
+        self.pending = self.cases
+
+    def move(self, source, target, n=1):
+        if not n:
+            return
+        self.counts[source] -= n
+        self.counts[target] += n
+        if target == self.case:
+            self.cases += n
+            self.pending += n
+
+    def record(self, day):
+        # Cases since the last call happened on this day
+        while len(self.new_cases) <= day:
+            self.new_cases.append(0)
+        self.new_cases[day] += self.pending
+        self.pending = 0
+
+    def get_state(self):
+        return {"counts": list(self.counts), "cases": self.cases,
+                "new_cases": list(self.new_cases), "pending": self.pending}
+
+    def set_state(self, state):
+        self.counts = list(state["counts"])
+        self.cases = state["cases"]
+        self.new_cases = list(state["new_cases"])
+        self.pending = state["pending"]
+
+    def daily(self):
+        """New cases and cumulative incidence per day."""
+        import pandas as pd
+        new_cases = np.array(self.new_cases, dtype=np.int64)
+        return pd.DataFrame({"New cases": new_cases, "Cases": np.cumsum(new_cases)},
+                            index=pd.RangeIndex(len(new_cases), name="Day"))
@@ -1,10 +1,15 @@
-import matplotlib.pyplot as plt
-from matplotlib import rcParams
-import pandas as pd
 import numpy as np
 import random
 import pygame
-import sys
+
+from Agents import Agent, int_dtype
+from Counters import Counters
+from Engine import Engine, wrap
+from Hud import Hud
+from Renderer import DirtyRects, SquareRenderer, color_surface, dirty_tiles
+from Scheduler import Scheduler
+from SpatialGrid import SparseTiles, SpatialGrid, grid_contacts, grid_pairs
+from Viewport import Viewport
 
 
 # Constants
@@ -12,61 +17,43 @@ SIZE = WIDTH, HIGHT = 1080, 720
 BLACK, WHITE, RED, GREEN, BLUE, GREY = (
     0, 0, 0), (255, 255, 255), (255, 0, 0), (0, 255, 0), (0, 0, 255), (100, 100, 100)
 BLOB_SIZE, VELOCITY = 10, 1
+HEALTHY, SUSPECTED, INFECTED, RECOVERED = 0, 1, 2, 3
+STATE_COLORS = (WHITE, BLUE, RED, GREEN)
+STEPS = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (-1, -1)]
 
 
 class Blob(pygame.sprite.Sprite):
-    def __init__(self, x, y, width, height, color, velocity, recovery_time, step=None):
+    def __init__(self, x, y, width, height, color, velocity, step=None):
         super(Blob, self).__init__()
         self.velocity = velocity
-        self.image = pygame.Surface([width, height])
-        self.image.fill(color)
+        self.image = color_surface(color, width, height)
         self.rect = self.image.get_rect()
         self.rect.center = [x, y]
         if step is None:
-            self.step = random.choice(
-                [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (-1, -1)])
+            self.step = random.choice(STEPS)
         else:
             self.step = step
 
-        if color == RED:
-            self.is_infected = True
-        else:
-            self.is_infected = False
-        self.recovery_time = recovery_time
-        self.to_recovery = 0
-
     def move(self, x, y):
         self.rect.x += int(x * self.velocity)
         self.rect.y += int(y * self.velocity)
-        if self.rect.midright[0] > WIDTH:
-            self.rect.center = [0 + BLOB_SIZE, self.rect.center[1]]
-        if self.rect.midleft[0] < 0:
-            self.rect.center = [WIDTH - BLOB_SIZE, self.rect.center[1]]
-
-        if self.rect.midbottom[1] > HIGHT:
-            self.rect.center = [self.rect.center[0], 0 + BLOB_SIZE]
-        if self.rect.midtop[1] < 0:
-            self.rect.center = [self.rect.center[0], HIGHT - BLOB_SIZE]
+        wrap(self.rect, WIDTH, HIGHT, BLOB_SIZE)
 
     def respawn(self, color):
-        if color == RED:
-            self.is_infected = True
-        return Blob(self.rect.center[0], self.rect.center[1], BLOB_SIZE, BLOB_SIZE, color, -self.velocity, self.recovery_time, self.step)
+        # Change state in place: shared colour surface, reversed velocity
+        self.image = color_surface(color, BLOB_SIZE, BLOB_SIZE)
+        self.velocity = -self.velocity
+        return self
 
     def update(self):
         # Random movement
         self.move(self.step[0], self.step[1])
 
-        # Countdown to recovery
-        if self.is_infected:
-            self.to_recovery += 1
-            if self.recovery_time <= self.to_recovery:
-                self.to_recovery = 0
-                self.is_infected = False
-
 
-class Simulation:
-    def __init__(self, population_size=100, initial_infected=10, initial_suspected=5, recovery_time=10, simulation_time=1000, width=1080, hight=720, stat_size=200, FPS=60):
+class Simulation(Engine):
+    def __init__(self, population_size=100, initial_infected=10, initial_suspected=5, recovery_time=10, simulation_time=1000, width=1080, hight=720, stat_size=200, FPS=60, headless=False, history_interval=1, history_size=None, history_path=None, seed=None, profiler=None, speed=1, render_fps=None, max_frame_ticks=1000, dirty=False, checkpoint_path=None, checkpoint_interval=None, trace=False, trace_size=None, transmission=None):
+        # Constructor arguments, saved with every checkpoint to rebuild the simulation
+        self.parameters = {name: value for name, value in locals().items() if name not in ("self", "profiler")}
         self.hight = hight
         self.width = width
         self.stat_size = stat_size
@@ -80,6 +67,10 @@ class Simulation:
             (self.initial_infected + self.initial_suspected)
 
         self.recovery_time = recovery_time * self.FPS
+        # Ticks from infection to recovery: the first update after the infection
+        # is the first tick of the countdown, the initially infected start one tick earlier
+        self.recovery_delay = max(self.recovery_time, 1)
+        self.initial_recovery_delay = max(self.recovery_time - 1, 0)
 
         self.healthy = pygame.sprite.Group()
         self.infected = pygame.sprite.Group()
@@ -87,43 +78,108 @@ class Simulation:
         self.suspected = pygame.sprite.Group()
 
         self.simulation_time = simulation_time * self.FPS
-
-        self.history = {
-            "Day": [0],
-            "Healthy": [self.initial_healthy],
-            "Suspected": [self.initial_suspected],
-            "Infected": [self.initial_infected],
-            "Recovered": [0]
-        }
-
-        # Setting up Pygame
+        self.setup(headless=headless, profiler=profiler, seed=seed, speed=speed, render_fps=render_fps,
+                   max_frame_ticks=max_frame_ticks, dirty=dirty, checkpoint_path=checkpoint_path,
+                   checkpoint_interval=checkpoint_interval, trace=trace, trace_size=trace_size,
+                   transmission=transmission, contact_size=BLOB_SIZE,
+                   history_interval=history_interval, history_size=history_size, history_path=history_path)
+
+        self.history = self.make_history(["Day", "Healthy", "Suspected", "Infected", "Recovered"])
+        # Agents per state, only changed by the transitions themselves
+        self.counters = Counters(
+            (self.initial_healthy, self.initial_suspected, self.initial_infected, 0), case=INFECTED)
+        self.history.append((0, *self.counters.counts))
+
+        # Setting up Pygame (headless runs never open a window)
+        if self.headless:
+            return
         pygame.init()
         self.font = pygame.font.SysFont("timesnewroman", 22)
         self.screen = pygame.display.set_mode(self.size)
         self.clock = pygame.time.Clock()
         pygame.display.set_caption("Simulation")
+        self.world = pygame.Rect(0, 0, self.width, self.hight)
+        self.hud = Hud(self.screen, self.font)
+        self.shown_counts = None
+        self.dirty_rects = DirtyRects(self.screen, BLACK, self.world) if self.dirty else None
+
+    def spawn(self):
+        # Centers and step indices of the whole population, drawn in one batch
+        n = self.population_size
+        return (self.rng.integers(0, self.width, n), self.rng.integers(0, self.hight, n),
+                self.rng.integers(0, len(STEPS), n))
 
     def initialize(self):
-        self.healthy.add([Blob(np.random.randint(0, self.width), np.random.randint(
-            0, self.hight), BLOB_SIZE, BLOB_SIZE, WHITE, VELOCITY, self.recovery_time, None) for _ in range(self.initial_healthy)])
-        self.infected.add([Blob(np.random.randint(0, self.width), np.random.randint(
-            0, self.hight), BLOB_SIZE, BLOB_SIZE, RED, VELOCITY, self.recovery_time, None) for _ in range(self.initial_infected)])
-        self.suspected.add([Blob(np.random.randint(0, self.width), np.random.randint(
-            0, self.hight), BLOB_SIZE, BLOB_SIZE, BLUE, VELOCITY, self.recovery_time, None) for _ in range(self.initial_suspected)])
+        x, y, steps = (values.tolist() for values in self.spawn())
+        # Recoveries are scheduled at infection and only the due ones are visited
+        self.scheduler = Scheduler()
+        # Population order: healthy, infected then suspected
+        infected = self.initial_healthy + self.initial_infected
+        for i in range(self.population_size):
+            if i < self.initial_healthy:
+                group, color = self.healthy, WHITE
+            elif i < infected:
+                group, color = self.infected, RED
+            else:
+                group, color = self.suspected, BLUE
+            blob = Blob(x[i], y[i], BLOB_SIZE, BLOB_SIZE, color, VELOCITY, STEPS[steps[i]])
+            blob.id = i
+            group.add(blob)
+            if group is self.infected:
+                self.scheduler.schedule(self.initial_recovery_delay, blob)
+        self.start_trace([blob.id for blob in self.infected], [blob.rect.x for blob in self.infected],
+                         [blob.rect.y for blob in self.infected])
 
     def check_collision(self):
-        for collision in pygame.sprite.groupcollide(self.suspected, self.infected, True, False):
+        # Only neighbouring cells are tested, newly infected blobs join the grid
+        grid = SpatialGrid(BLOB_SIZE, self.infected) if self.transmission is None else None
+        collisions, infectors = self.infections(grid, self.suspected, SUSPECTED, with_sources=self.trace is not None)
+        if self.trace is not None:
+            self.trace.record(self.tick, infectors, [blob.id for blob in collisions],
+                              [blob.rect.x for blob in collisions], [blob.rect.y for blob in collisions])
+        for collision in collisions:
+            self.suspected.remove(collision)
             self.infected.add(collision.respawn(RED))
-
-        for collision in pygame.sprite.groupcollide(self.healthy, self.infected, True, False):
+            self.scheduler.schedule(self.recovery_delay, collision)
+            if grid is not None:
+                grid.add(collision)
+        self.counters.move(SUSPECTED, INFECTED, len(collisions))
+
+        collisions, _ = self.infections(grid, self.healthy, HEALTHY)
+        for collision in collisions:
+            self.healthy.remove(collision)
             self.suspected.add(collision.respawn(BLUE))
+        self.counters.move(HEALTHY, SUSPECTED, len(collisions))
+
+    def infections(self, grid, group, state, with_sources=False):
+        # Blobs of group (in state) an infected blob infects this tick, and with_sources the id of its infector
+        if self.transmission is not None:
+            return self.transmit(group, self.infected, state)
+        collisions = grid.groupcollide(group)
+        if not with_sources:
+            return collisions, None
+        # The infector is the overlapping infected blob of lowest id, as in ArraySimulation
+        return collisions, [min(blob.id for blob in grid.colliding(collision)) for collision in collisions]
 
     def check_recovery(self):
-        for infected in self.infected:
-            if not infected.is_infected:
-                self.recovered.add(infected.respawn(GREEN))
-                self.infected.remove(infected)
-                infected.kill()
+        recovered = self.scheduler.advance()
+        for infected in recovered:
+            self.infected.remove(infected)
+            self.recovered.add(infected.respawn(GREEN))
+        self.counters.move(INFECTED, RECOVERED, len(recovered))
+
+    def step(self):
+        # Movement
+        self.update()
+        self.lap("update")
+
+        # Check for collision
+        self.check_collision()
+        self.lap("collision")
+
+        # Check recovered
+        self.check_recovery()
+        self.lap("recovery")
 
     def update(self):
         self.healthy.update()
@@ -132,11 +188,23 @@ class Simulation:
         self.recovered.update()
 
     def draw(self):
-        self.screen.fill(BLACK)
-        pygame.draw.rect(self.screen, GREY, pygame.Rect(
-            0, self.hight, self.width, self.stat_size), 2)
+        if self.dirty_rects is not None:
+            self.dirty_rects.draw(self.healthy, self.infected, self.suspected, self.recovered)
+            return
 
-        self.show_bar()
+        # Only the world is repainted every frame, the stats panel is kept by the HUD
+        self.screen.fill(BLACK, self.world)
+        self.screen.set_clip(self.world)
+        self.healthy.draw(self.screen)
+        self.infected.draw(self.screen)
+        self.suspected.draw(self.screen)
+        self.recovered.draw(self.screen)
+        self.screen.set_clip(None)
+
+    def show_panel(self):
+        panel = pygame.Rect(0, self.hight, self.width, self.stat_size)
+        self.screen.fill(BLACK, panel)
+        pygame.draw.rect(self.screen, GREY, panel, 2)
 
         pygame.draw.rect(self.screen, WHITE, pygame.Rect(
             220, self.hight + (self.stat_size // 16), BLOB_SIZE * 10, BLOB_SIZE))
@@ -147,127 +215,382 @@ class Simulation:
         pygame.draw.rect(self.screen, GREEN, pygame.Rect(
             760, self.hight + (self.stat_size // 16), BLOB_SIZE * 10, BLOB_SIZE))
 
-        self.healthy.draw(self.screen)
-        self.infected.draw(self.screen)
-        self.suspected.draw(self.screen)
-        self.recovered.draw(self.screen)
+        # Everything on the panel is drawn again on the next stats()
+        self.hud.invalidate()
+        self.hud.mark(panel)
+        self.shown_counts = None
 
     def show_bar(self):
         bar_length = self.width - 100
         ratio = self.population_size / bar_length
+        bar = pygame.Rect(50, self.hight + self.stat_size - 20, bar_length, 15)
+        self.screen.fill(BLACK, bar)
         healthy_bar = pygame.Rect(
-            50, self.hight + self.stat_size - 20, self.history["Healthy"][-1] // ratio, 15)
+            50, self.hight + self.stat_size - 20, self.history.latest["Healthy"] // ratio, 15)
         pygame.draw.rect(self.screen, WHITE, healthy_bar)
 
         infected_bar = pygame.Rect(
-            healthy_bar.right, self.hight + self.stat_size - 20, self.history["Infected"][-1] // ratio, 15)
+            healthy_bar.right, self.hight + self.stat_size - 20, self.history.latest["Infected"] // ratio, 15)
         pygame.draw.rect(self.screen, RED, infected_bar)
 
         suspected_bar = pygame.Rect(
-            infected_bar.right, self.hight + self.stat_size - 20, self.history["Suspected"][-1] // ratio, 15)
+            infected_bar.right, self.hight + self.stat_size - 20, self.history.latest["Suspected"] // ratio, 15)
         pygame.draw.rect(self.screen, BLUE, suspected_bar)
 
         recovered_bar = pygame.Rect(
-            suspected_bar.right, self.hight + self.stat_size - 20, self.history["Recovered"][-1] // ratio, 15)
+            suspected_bar.right, self.hight + self.stat_size - 20, self.history.latest["Recovered"] // ratio, 15)
         pygame.draw.rect(self.screen, GREEN, recovered_bar)
 
-        pygame.draw.rect(self.screen, GREY, pygame.Rect(
-            50, self.hight + self.stat_size - 20, bar_length, 15), 2)
+        pygame.draw.rect(self.screen, GREY, bar, 2)
+        self.hud.mark(bar)
 
     def show_text(self, surface, position, background=BLACK):
         rect = surface.get_rect(center=position)
         pygame.draw.rect(self.screen, background, rect)
         self.screen.blit(surface, rect)
 
+    def counts(self):
+        return tuple(self.counters.counts)
+
+    def record(self, day):
+        self.counters.record(day // self.FPS)
+        self.history.append((day // self.FPS, *self.counters.counts))
+
     def stats(self, day):
-        self.history["Day"].append(day // self.FPS)
-        self.history["Healthy"].append(len(self.healthy))
-        self.history["Suspected"].append(len(self.suspected))
-        self.history["Infected"].append(len(self.infected))
-        self.history["Recovered"].append(len(self.recovered))
-
-        self.show_text(
-            self.font.render(f"Day: {day // self.FPS}", True, WHITE),
-            (self.width // 16,
-             self.hight + (self.stat_size // 8))
-        )
+        # Text is re-rendered only when it changes, glyphs come from the HUD cache
+        self.hud.text("day", f"Day: {day // self.FPS}  x{self.speed:g}",
+                      (self.width // 16, self.hight + (self.stat_size // 8)))
 
-        stat_surface = self.font.render(
+        self.hud.text(
+            "header",
             f"{f'Healthy':^25}"
             f"{f'Suspected':^25}"
             f"{f'Infected':^25}"
             f"{f'Recovered':^25}",
-            True, WHITE
+            (self.width // 2, self.hight + (self.stat_size // 4))
         )
-        self.show_text(stat_surface, (self.width // 2,
-                       self.hight + (self.stat_size // 4)))
-
-        stat_surface = self.font.render(
-            f"{len(self.healthy):^30}"
-            f"{len(self.suspected):^30}"
-            f"{len(self.infected):^30}"
-            f"{len(self.recovered):^30}",
-            True, WHITE
+
+        _, healthy, suspected, infected, recovered = self.history.latest.values()
+        if (healthy, suspected, infected, recovered) == self.shown_counts:
+            return
+        self.shown_counts = (healthy, suspected, infected, recovered)
+
+        self.hud.text(
+            "counts",
+            f"{healthy:^30}"
+            f"{suspected:^30}"
+            f"{infected:^30}"
+            f"{recovered:^30}",
+            (self.width // 2, self.hight + (self.stat_size // 2))
         )
-        self.show_text(stat_surface, (self.width // 2,
-                       self.hight + (self.stat_size // 2)))
-
-        stat_surface = self.font.render(
-            f"{f'{len(self.healthy) / self.population_size:.1%}':^28}"
-            f"{f'{len(self.suspected) / self.population_size:.1%}':^28}"
-            f"{f'{len(self.infected) / self.population_size:.1%}':^28}"
-            f"{f'{len(self.recovered) / (self.population_size + len(self.healthy)):.1%}':^28}",
-            True, WHITE
+
+        self.hud.text(
+            "ratios",
+            f"{f'{healthy / self.population_size:.1%}':^28}"
+            f"{f'{suspected / self.population_size:.1%}':^28}"
+            f"{f'{infected / self.population_size:.1%}':^28}"
+            f"{f'{recovered / (self.population_size + healthy):.1%}':^28}",
+            (self.width // 2, self.hight + self.stat_size - 50)
         )
-        self.show_text(
-            stat_surface,
-            (self.width // 2, self.hight + self.stat_size - 50))
-
-    def show_graph(self):
-        df = pd.DataFrame(self.history)
-        df.groupby("Day").mean().plot()
-        plt.title("Overview of the simulation")
-        plt.grid(True)
-        plt.style.use("ggplot")
-        plt.show()
 
-    def start(self):
-        # Initialize the simulation
-        self.initialize()
+        self.show_bar()
 
-        # The main loop
-        for day in range(self.simulation_time):
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.stop()
+    def start(self):
+        return self.run()
+
+    def first_frame(self):
+        self.show_panel()
+        pygame.display.update()
+
+    def frame(self):
+        # Drawing to the screen
+        self.draw()
+        self.lap("draw")
+
+        # Display the current stats
+        self.stats(self.tick)
+        self.draw_profiler((self.width - 10, self.hight - 10))
+        self.lap("stats")
+
+        # The world and whatever changed on the stats panel
+        return self.changed() + self.hud.flush()
+
+    def changed(self):
+        # Rects of the world drawn since the last display update
+        if self.dirty_rects is None:
+            return [self.world]
+        return self.dirty_rects.flush()
+
+    def get_state(self):
+        state = {
+            "simulation": type(self).__name__,
+            "parameters": self.parameters,
+            "tick": self.tick,
+            "speed": self.speed,
+            "rng": self.rng.bit_generator.state,
+            "agents": self.agents(),
+            "counters": self.counters.get_state(),
+            "history": self.history.get_state(),
+        }
+        if self.trace is not None:
+            state["trace"] = self.trace.get_state()
+        return state
 
-            # Movement
-            self.update()
+    def set_state(self, state):
+        self.initialize()
+        self.set_agents(state["agents"])
+        self.tick = state["tick"]
+        self.speed = state["speed"]
+        self.rng.bit_generator.state = state["rng"]
+        self.counters.set_state(state["counters"])
+        self.history.set_state(state["history"])
+        if self.trace is not None and "trace" in state:
+            self.trace.set_state(state["trace"])
+        self.restored = True
+
+    def agents(self):
+        # Every blob as the columns of ArraySimulation, group by group in iteration order
+        groups = ((HEALTHY, self.healthy), (SUSPECTED, self.suspected),
+                  (INFECTED, self.infected), (RECOVERED, self.recovered))
+        blobs = [(state, blob) for state, group in groups for blob in group]
+        # Ticks left until the scheduled recovery, -1 when none is
+        recovery = {blob: tick - self.scheduler.now for blob, tick in self.scheduler.due().items()}
+        return {
+            "id": np.array([blob.id for _, blob in blobs], dtype=np.int64),
+            "state": np.array([state for state, _ in blobs], dtype=np.uint8),
+            "x": np.array([blob.rect.x for _, blob in blobs], dtype=np.int64),
+            "y": np.array([blob.rect.y for _, blob in blobs], dtype=np.int64),
+            "steps": np.array([blob.step for _, blob in blobs], dtype=np.int64).reshape(-1, 2),
+            "velocity": np.array([blob.velocity for _, blob in blobs], dtype=np.int64),
+            "recovery": np.array([recovery.get(blob, -1) for _, blob in blobs], dtype=np.int64),
+        }
 
-            # Check for collision
-            self.check_collision()
+    def set_agents(self, agents):
+        groups = {HEALTHY: self.healthy, SUSPECTED: self.suspected,
+                  INFECTED: self.infected, RECOVERED: self.recovered}
+        for group in groups.values():
+            group.empty()
+        self.scheduler = Scheduler()
+        for id, state, x, y, step, velocity, recovery in zip(
+                *(agents[name].tolist() for name in ("id", "state", "x", "y", "steps", "velocity", "recovery"))):
+            blob = Blob(0, 0, BLOB_SIZE, BLOB_SIZE, STATE_COLORS[state], velocity, tuple(step))
+            blob.rect.topleft = x, y
+            blob.id = id
+            groups[state].add(blob)
+            # Column order is the order of infection, due events keep it
+            if recovery >= 0:
+                self.scheduler.schedule(recovery, blob)
+
+
+def move_agents(x, y, steps, velocity, width=WIDTH, hight=HIGHT):
+    # One tick of Blob.move for agent columns (or any slice of them), in place
+    x += steps[:, 0] * velocity
+    y += steps[:, 1] * velocity
+
+    # Toroidal wrap, applied in the same order as Blob.move
+    half = BLOB_SIZE // 2
+    x[x + BLOB_SIZE > width] = BLOB_SIZE - half
+    x[x < 0] = width - BLOB_SIZE - half
+    y[y + BLOB_SIZE > hight] = BLOB_SIZE - half
+    y[y < 0] = hight - BLOB_SIZE - half
+
+
+class ArraySimulation(Simulation):
+    """Struct-of-arrays engine: every agent lives in NumPy columns instead of a Blob sprite.
+
+    Columns use the smallest dtype that holds them, 8 bytes per agent against
+    a few kilobytes for a Blob. agent(i) is an object view of one row.
+
+    world=(width, hight) sets a world of its own instead of the window's
+    WIDTH x HIGHT, e.g. a 100000 x 100000 city, shown through a Viewport.
+    Frames only draw the agents in view, found through SparseTiles of
+    tile_size units, and nothing the engine keeps grows with the world's area.
+    """
+
+    # Dtype of every agent column, positions sized to hold the world and one blob past its edges
+    COLUMNS = {
+        "state": np.dtype(np.uint8),
+        "x": int_dtype(-BLOB_SIZE, WIDTH + BLOB_SIZE),
+        "y": int_dtype(-BLOB_SIZE, HIGHT + BLOB_SIZE),
+        "steps": np.dtype(np.int8),
+        "velocity": np.dtype(np.int8),
+    }
+
+    def __init__(self, *args, world=None, tile_size=256, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Saved only with a world of its own, so other checkpoints still load in the sprite engine
+        if world is not None:
+            self.parameters.update(world=world, tile_size=tile_size)
+        self.world_size = tuple(world) if world else (WIDTH, HIGHT)
+        width, hight = self.world_size
+        self.COLUMNS = {**self.COLUMNS, "x": int_dtype(-BLOB_SIZE, width + BLOB_SIZE),
+                        "y": int_dtype(-BLOB_SIZE, hight + BLOB_SIZE)}
+        # Agents by tile for culling, rebuilt once they may have left their tiles
+        self.sparse_tiles = SparseTiles(tile_size)
+        self.sparse_tick = None
+        if not self.headless:
+            self.viewport = Viewport(self.world, width, hight)
+            self.renderers = {}
+
+    def spawn(self):
+        if "world" not in self.parameters:
+            return super().spawn()
+        n = self.population_size
+        return (self.rng.integers(0, self.world_size[0], n), self.rng.integers(0, self.world_size[1], n),
+                self.rng.integers(0, len(STEPS), n))
 
-            # Check recovered
-            self.check_recovery()
+    def initialize(self):
+        n = self.population_size
+        # Same order as the sprite engine: healthy, infected then suspected
+        self.state = np.repeat(
+            np.array([HEALTHY, INFECTED, SUSPECTED], dtype=np.uint8),
+            [self.initial_healthy, self.initial_infected, self.initial_suspected])
+        # Rect top-left corners, exactly what pygame stores for a Blob
+        x, y, steps = self.spawn()
+        self.x = (x - BLOB_SIZE // 2).astype(self.COLUMNS["x"])
+        self.y = (y - BLOB_SIZE // 2).astype(self.COLUMNS["y"])
+        self.steps = np.array(STEPS, dtype=self.COLUMNS["steps"])[steps]
+        self.velocity = np.full(n, VELOCITY, dtype=self.COLUMNS["velocity"])
+        # Events are the index arrays of the agents infected on the same tick
+        self.scheduler = Scheduler()
+        infected = np.flatnonzero(self.state == INFECTED)
+        self.scheduler.schedule(self.initial_recovery_delay, infected)
+        self.start_trace(infected, self.x[infected], self.y[infected])
+        # Dirty mode: where and how large the squares were drawn last frame, erased with black squares
+        self.drawn = None
+
+    def agents(self):
+        # An agent's id is its index
+        agents = {"id": np.arange(self.population_size)}
+        agents.update((name, getattr(self, name).copy()) for name in self.COLUMNS)
+        agents["recovery"] = np.full(self.population_size, -1, dtype=np.int64)
+        for tick, events in self.scheduler.calendar.items():
+            for infected in events:
+                agents["recovery"][infected] = tick - self.scheduler.now
+        return agents
+
+    def set_agents(self, agents):
+        # Rows back in id order, the sprite engine saves them group by group
+        order = np.argsort(agents["id"], kind="stable")
+        for name, dtype in self.COLUMNS.items():
+            setattr(self, name, agents[name][order].astype(dtype))
+        self.scheduler = Scheduler()
+        recovery = agents["recovery"][order]
+        for delay in np.unique(recovery[recovery >= 0]).tolist():
+            self.scheduler.schedule(delay, np.flatnonzero(recovery == delay))
+
+    def agent(self, index):
+        return Agent(self, index)
+
+    def move(self):
+        move_agents(self.x, self.y, self.steps, self.velocity, *self.world_size)
 
-            # Drawing to the screen
-            self.draw()
+    def update(self):
+        # Random movement
+        self.move()
+
+    def contacts(self, candidate, source, with_sources=False):
+        # Indices of the agents in state candidate whose rect overlaps one in state source,
+        # with the lowest overlapping source of each when with_sources
+        return grid_contacts(self.x, self.y, np.flatnonzero(self.state == candidate),
+                             np.flatnonzero(self.state == source), BLOB_SIZE, with_sources=with_sources)
+
+    def pairs(self, candidate, source, radius):
+        # Every (candidate, source, distance) of agents in those states closer than radius
+        return grid_pairs(self.x, self.y, np.flatnonzero(self.state == candidate),
+                          np.flatnonzero(self.state == source), radius)
+
+    def infections(self, candidate, with_sources=False):
+        # Agents in state candidate an infected agent infects this tick, with_sources with their infectors
+        if self.transmission is None:
+            return self.contacts(candidate, INFECTED, with_sources)
+        pairs = self.pairs(candidate, INFECTED, self.transmission.radius)
+        infected, infectors = self.transmission.infect(self.rng, *pairs, candidate)
+        return (infected, infectors) if with_sources else infected
+
+    def transition(self, agents, source, state):
+        # Same effect as Blob.respawn: new colour and reversed velocity
+        self.state[agents] = state
+        self.velocity[agents] *= -1
+        self.counters.move(source, state, len(agents))
 
-            # Display the current stats
-            self.stats(day)
+    def check_collision(self):
+        if self.trace is None:
+            infections = self.infections(SUSPECTED)
+        else:
+            infections, infectors = self.infections(SUSPECTED, with_sources=True)
+            self.trace.record(self.tick, infectors, infections, self.x[infections], self.y[infections])
+        self.transition(infections, SUSPECTED, INFECTED)
+        if len(infections):
+            self.scheduler.schedule(self.recovery_delay, infections)
 
-            pygame.display.update()
-            self.clock.tick(self.FPS)
+        self.transition(self.infections(HEALTHY), HEALTHY, SUSPECTED)
 
-        self.stop()
+    def check_recovery(self):
+        due = self.scheduler.advance()
+        self.transition(np.concatenate(due) if due else np.empty(0, dtype=np.int64), INFECTED, RECOVERED)
+
+    def renderer(self, size, palette=STATE_COLORS):
+        # One renderer per square size and palette, the size changes with the zoom
+        if (size, palette) not in self.renderers:
+            self.renderers[size, palette] = SquareRenderer(size, palette)
+        return self.renderers[size, palette]
+
+    def control(self, event):
+        super().control(event)
+        self.viewport.control(event)
+
+    def cull(self, left, top, right, bottom):
+        # Agents whose square overlaps the world rect, from the tiles around it
+        drift = None if self.sparse_tick is None else (self.tick - self.sparse_tick) * self.reach
+        if drift is None or drift > self.sparse_tiles.tile_size or self.sparse_tiles.x is not self.x:
+            self.build_tiles()
+            drift = 0
+        left, top = left - BLOB_SIZE, top - BLOB_SIZE
+        found = self.sparse_tiles.query(left, top, right, bottom, margin=drift)
+        x, y = self.x[self.edge], self.y[self.edge]
+        wrapped = self.edge[(x >= left) & (x < right) & (y >= top) & (y < bottom)]
+        return np.union1d(found, wrapped)
+
+    def build_tiles(self):
+        self.sparse_tiles.build(self.x, self.y)
+        self.sparse_tick = self.tick
+        # Units an agent moves per tick, at most one step of its velocity on each axis
+        self.reach = int(np.abs(self.velocity).max(initial=0))
+        # Agents close enough to an edge to wrap to the other side before the next build,
+        # where the tiles can't find them: tested on every query
+        band = self.sparse_tiles.tile_size + BLOB_SIZE
+        width, hight = self.world_size
+        self.edge = np.flatnonzero((self.x < band) | (self.x >= width - band)
+                                   | (self.y < band) | (self.y >= hight - band))
+
+    def visible(self):
+        # Screen corners, states and square size of the agents in view
+        if self.viewport.identity():
+            return self.x, self.y, self.state, BLOB_SIZE
+        index = self.cull(*self.viewport.bounds())
+        x, y = self.viewport.to_screen(self.x[index], self.y[index])
+        return x, y, self.state[index], self.viewport.scale(BLOB_SIZE)
 
-    def stop(self):
-        pygame.quit()
-        self.show_graph()
-        sys.exit()
+    def draw(self):
+        super().draw()
+        if self.dirty_rects is not None and self.drawn is not None:
+            # Erase the squares of the last frame, every square is drawn again below
+            x, y, size = self.drawn
+            self.renderer(size, (BLACK,)).draw(self.screen, x, y, np.zeros(len(x), dtype=np.uint8), self.world)
+        # Every agent in view in one pass over the screen pixels, no per-agent surface
+        x, y, state, size = self.visible()
+        self.renderer(size).draw(self.screen, x, y, state, self.world)
+        if self.dirty_rects is not None:
+            # Squares wider than the default tiles are marked with tiles of their size
+            old_x, old_y, old_size = (x, y, size) if self.drawn is None else self.drawn
+            self.dirty_rects.mark(*dirty_tiles(np.concatenate([old_x, x]), np.concatenate([old_y, y]),
+                                               max(size, old_size), self.world, tile=max(16, size, old_size)))
+            self.drawn = x.copy(), y.copy(), size
 
 
 if __name__ == '__main__':
+    from matplotlib import rcParams
     rcParams["figure.figsize"] = 12, 8
     covid = Simulation(
         population_size=800,
@@ -0,0 +1,255 @@
+import sys
+
+import numpy as np
+import pygame
+
+import Checkpoint
+from History import History
+from Sinks import open_sink, read_rows
+from SpatialGrid import grid_pairs
+from Trace import Trace
+from Transmission import Transmission
+
+
+def wrap(rect, width, height, margin):
+    # Toroidal edges: a rect leaving one side comes back `margin` inside the opposite one
+    if rect.midright[0] > width:
+        rect.center = [0 + margin, rect.center[1]]
+    if rect.midleft[0] < 0:
+        rect.center = [width - margin, rect.center[1]]
+
+    if rect.midbottom[1] > height:
+        rect.center = [rect.center[0], 0 + margin]
+    if rect.midtop[1] < 0:
+        rect.center = [rect.center[0], height - margin]
+
+
+def pyplot():
+    # matplotlib costs a few hundred milliseconds to import, only pay for it when plotting
+    import matplotlib.pyplot as plt
+    return plt
+
+
+class Engine:
+    """Fixed-tick main loop and the plumbing shared by the Covid simulations.
+
+    A simulation provides initialize(), step() (one tick of transitions),
+    record(tick), frame() (draw the window and return the rects to update, or
+    None for all of it) and get_state()/set_state() for checkpoints. It sets
+    FPS (ticks per day) and simulation_time, then calls setup() for the
+    settings every simulation shares (rng, speed, render_fps, checkpoints,
+    tracing, transmission, ...) and builds its history with make_history().
+    Rendered frames run at render_fps whatever the speed, headless runs skip
+    the window altogether.
+    """
+
+    def setup(self, headless, profiler, seed, speed, render_fps, max_frame_ticks, dirty,
+              checkpoint_path, checkpoint_interval, trace, trace_size, transmission, contact_size,
+              history_interval, history_size, history_path):
+        # Constructor settings shared by the simulations, once FPS and simulation_time are set
+        self.headless = headless
+        self.profiler = profiler
+        # Every random draw of the simulation comes from this generator
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
+        # Simulation ticks per tick of real time (FPS ticks are one day),
+        # independent of how often frames are rendered
+        self.speed = speed
+        self.render_fps = render_fps or self.FPS
+        self.max_frame_ticks = max_frame_ticks
+        # Only erase, redraw and update the screen where agents were or are
+        self.dirty = dirty
+
+        # Snapshot of the whole state to checkpoint_path every checkpoint_interval ticks
+        if checkpoint_interval and checkpoint_path is None:
+            raise ValueError("checkpoint_interval needs a checkpoint_path to save to")
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        # Who infected whom, see Trace: trace_size bounds the number of events kept
+        self.tracing = trace
+        self.trace_size = trace_size
+        self.trace = None
+        # Keyword arguments of a Transmission, None infects on any overlap of contact_size squares
+        self.transmission = None if transmission is None else Transmission(**{"radius": contact_size, **transmission})
+
+        # One row every history_interval ticks, history_size keeps only the last rows.
+        # With history_path rows are streamed to that file in chunks of history_size
+        self.history_interval = history_interval
+        self.history_size = history_size
+        self.history_path = history_path
+        self.tick = 0
+        self.restored = False
+
+    def make_history(self, columns):
+        if self.history_path is None:
+            return History(
+                columns,
+                capacity=self.history_size or self.simulation_time // self.history_interval + 2,
+                interval=self.history_interval,
+                ring=self.history_size is not None
+            )
+        return History(
+            columns,
+            capacity=self.history_size or 4096,
+            interval=self.history_interval,
+            sink=open_sink(self.history_path, columns)
+        )
+
+    def run(self):
+        # Initialize the simulation, unless it was restored from a checkpoint
+        if not self.restored:
+            self.initialize()
+
+        if self.headless:
+            return self.run_headless()
+
+        self.first_frame()
+        return self.loop()
+
+    def first_frame(self):
+        # Whatever is drawn once before the main loop
+        pass
+
+    def loop(self):
+        # The main loop: fixed simulation ticks, decoupled from the rendered frames
+        accumulator = 0.0
+        elapsed = 1000 / self.render_fps
+        while self.tick < self.simulation_time:
+            if self.profiler is not None:
+                self.profiler.tick()
+
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    if self.checkpoint_path is not None:
+                        self.save(self.checkpoint_path)
+                    self.stop()
+                self.control(event)
+            self.lap("events")
+
+            # Real time since the last frame, in simulation ticks at the current speed
+            accumulator += elapsed * self.FPS * self.speed / 1000
+            ticks = min(int(accumulator), self.max_frame_ticks, self.simulation_time - self.tick)
+            # A backlog the frame can't catch up with is dropped instead of piling up
+            accumulator = accumulator - ticks if ticks < self.max_frame_ticks else 0.0
+            for _ in range(ticks):
+                self.advance()
+
+            # Drawing, then only what changed goes to the display
+            rects = self.frame()
+            if rects is None:
+                pygame.display.update()
+            else:
+                pygame.display.update(rects)
+            self.lap("display")
+            elapsed = self.clock.tick(self.render_fps)
+            self.lap("wait")
+
+        return self.stop()
+
+    def run_headless(self):
+        # No drawing, no text and no frame limiter: run as fast as possible
+        while self.tick < self.simulation_time:
+            if self.profiler is not None:
+                self.profiler.tick()
+            self.advance()
+
+        return self.stop()
+
+    def advance(self):
+        # One tick, its history row and the checkpoint when one is due
+        self.step()
+        self.record(self.tick)
+        self.lap("record")
+        self.tick += 1
+        self.autosave()
+
+    def start_trace(self, infected, x, y):
+        # With tracing on, a fresh log whose roots are the initially infected
+        self.trace = Trace(self.trace_size) if self.tracing else None
+        if self.trace is not None:
+            self.trace.record(0, [-1] * len(infected), infected, x, y)
+
+    def transmit(self, candidates, sources, state):
+        # Sprites of candidates (in state) infected by the transmission model from
+        # sources, and the id of each one's infector. Both sorted by id, so pair
+        # order and draws are those of ArraySimulation
+        candidates = sorted(candidates, key=lambda blob: blob.id)
+        sources = sorted(sources, key=lambda blob: blob.id)
+        blobs = candidates + sources
+        x = np.array([blob.rect.x for blob in blobs], dtype=np.int64)
+        y = np.array([blob.rect.y for blob in blobs], dtype=np.int64)
+        pairs = grid_pairs(x, y, np.arange(len(candidates)), np.arange(len(candidates), len(blobs)),
+                           self.transmission.radius)
+        infected, infectors = self.transmission.infect(self.rng, *pairs, state)
+        return [candidates[i] for i in infected.tolist()], [blobs[i].id for i in infectors.tolist()]
+
+    def lap(self, phase):
+        # Time the phase that just ended when a profiler is attached
+        if self.profiler is not None:
+            self.profiler.lap(phase)
+
+    def draw_profiler(self, position):
+        # Profiler overlay on top of the frame, erased by the next dirty frame
+        if self.profiler is None:
+            return
+        overlay = self.profiler.draw(self.screen, position)
+        if self.dirty_rects is not None:
+            self.dirty_rects.overlay(*overlay)
+
+    def control(self, event):
+        # Up / down arrows double or halve the simulation speed
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_UP:
+                self.speed *= 2
+            elif event.key == pygame.K_DOWN:
+                self.speed /= 2
+
+    def stop(self):
+        pygame.quit()
+        self.history.close()
+        if self.profiler is not None:
+            self.profiler.close()
+            print(self.profiler.report())
+        if self.headless:
+            return self.history
+        self.show_graph()
+        sys.exit()
+
+    def show_graph(self):
+        plt = pyplot()
+        self.history.daily().plot()
+        plt.title("Overview of the simulation")
+        plt.grid(True)
+        plt.style.use("ggplot")
+        plt.show()
+
+    def autosave(self):
+        if self.checkpoint_interval and self.tick % self.checkpoint_interval == 0:
+            self.save(self.checkpoint_path)
+
+    def save(self, path):
+        """Snapshot of the whole simulation to path, see load()."""
+        Checkpoint.save(path, self.get_state())
+
+    @classmethod
+    def load(cls, path, **parameters):
+        """The simulation saved to path, continuing where it stopped.
+
+        Keyword arguments override the saved constructor arguments, e.g.
+        headless=True, a new history_path or a longer simulation_time, or a
+        different recovery_time to branch a what-if run from the snapshot.
+        """
+        state = Checkpoint.load(path)
+        parameters = {**state["parameters"], **parameters}
+        # Resuming into the same history file: the rows flushed before the snapshot are
+        # read back before the new sink truncates it, and written to it first
+        written = state["history"].get("written", 0)
+        flushed = None
+        if written and parameters.get("history_path") == state["parameters"].get("history_path"):
+            flushed = read_rows(parameters["history_path"], written)
+        sim = cls(**parameters)
+        sim.set_state(state)
+        if flushed is not None:
+            sim.history.sink.write(flushed)
+        return sim
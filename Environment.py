@@ -0,0 +1,167 @@
+import multiprocessing
+
+import numpy as np
+
+from SimAI import ACTIONS, PLAYER_SIZE, ArraySimulation
+
+
+class Environment:
+    """Gym-style food-gathering environment over the SimAI world, without a window.
+
+    Every player is an agent: step(actions) takes one index into SimAI.ACTIONS
+    per player and returns (observation, reward, terminated, truncated, info)
+    like a gymnasium environment. A player observes its normalized position and
+    the food left in the 3x3 cells of `view` pixels around it, and is rewarded
+    with the food it ate this step. An episode terminates when the food is gone
+    and is truncated after `runtime` seconds worth of ticks.
+    """
+
+    def __init__(self, height=1080, width=720, runtime=20, fps=60, population_size=1, nb_food=1000, view=60):
+        self.size = (height, width)
+        self.runtime = runtime
+        self.fps = fps
+        self.population_size = population_size
+        self.nb_food = nb_food
+        self.view = view
+        self.action_count = len(ACTIONS)
+        self.observation_size = 2 + 9
+        self.rng = None
+        self.sim = None
+
+        # Food counts per view cell, padded by one cell so the 3x3 lookups never leave the grid
+        self.grid = (height // view + 3, width // view + 3)
+        self.neighbours = np.array([dx * self.grid[1] + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1)])
+
+    def cell(self, x, y):
+        return (x // self.view + 1) * self.grid[1] + y // self.view + 1
+
+    def reset(self, seed=None):
+        if seed is not None or self.rng is None:
+            self.rng = np.random.default_rng(seed)
+        # Every episode is a new world, seeded from the environment generator
+        self.sim = ArraySimulation(*self.size, self.runtime, fps=self.fps, population_size=self.population_size,
+                                   nb_food=self.nb_food, seed=int(self.rng.integers(2 ** 63)), headless=True)
+        self.sim.initialize()
+        self.ticks = 0
+        self.food_left = self.nb_food
+        self.food_cells = self.cell(self.sim.foods.x, self.sim.foods.y)
+        self.food_counts = np.bincount(self.food_cells, minlength=self.grid[0] * self.grid[1])
+        return self.observe(), {}
+
+    def observe(self):
+        sim = self.sim
+        center = PLAYER_SIZE // 2
+        around = self.food_counts[self.cell(sim.x + center, sim.y + center)[:, None] + self.neighbours]
+        return np.column_stack([sim.x / self.size[0], sim.y / self.size[1], around]).astype(np.float32)
+
+    def step(self, actions):
+        actions = np.broadcast_to(np.asarray(actions, dtype=np.int64), (self.population_size,))
+        if actions.min(initial=0) < 0 or actions.max(initial=0) >= self.action_count:
+            raise ValueError(f"actions must be in [0, {self.action_count})")
+        sim = self.sim
+        score = sim.score.copy()
+        sim.move(actions)
+        eaten = sim.check_collision()
+        np.subtract.at(self.food_counts, self.food_cells[eaten], 1)
+        self.food_left -= len(eaten)
+        self.ticks += 1
+
+        terminated = self.food_left == 0
+        truncated = not terminated and self.ticks >= sim.simulation_time
+        return self.observe(), sim.score - score, terminated, truncated, {"score": sim.score.copy()}
+
+
+class Batch:
+    """Environments stepped one after the other, results stacked on a leading axis.
+
+    A finished environment resets itself, the observation and score it ended
+    with are in info["final_observation"] and info["final_score"].
+    """
+
+    def __init__(self, environments):
+        self.environments = environments
+
+    def reset(self, seeds):
+        return np.stack([environment.reset(seed)[0] for environment, seed in zip(self.environments, seeds)])
+
+    def step(self, actions):
+        observations, rewards, terminated, truncated = [], [], [], []
+        info = {"final_observation": {}, "final_score": {}}
+        for i, (environment, action) in enumerate(zip(self.environments, actions)):
+            observation, reward, done, cut, step_info = environment.step(action)
+            if done or cut:
+                info["final_observation"][i] = observation
+                info["final_score"][i] = step_info["score"]
+                observation, _ = environment.reset()
+            observations.append(observation)
+            rewards.append(reward)
+            terminated.append(done)
+            truncated.append(cut)
+        return np.stack(observations), np.stack(rewards), np.array(terminated), np.array(truncated), info
+
+
+def work(connection, count, options):
+    # Subprocess side of VectorEnvironment: run the commands of the parent on its batch
+    batch = Batch([Environment(**options) for _ in range(count)])
+    while True:
+        command, data = connection.recv()
+        if command == "close":
+            break
+        connection.send(getattr(batch, command)(data))
+    connection.close()
+
+
+class VectorEnvironment:
+    """`num_envs` independent Environments stepped in lockstep.
+
+    Observations are (num_envs, players, observation_size), rewards (num_envs,
+    players), actions one per player or one per environment. With workers=0 the
+    environments run in this process, otherwise they are split over `workers`
+    subprocesses that step their share in parallel. reset(seed) seeds
+    environment i with seed + i.
+    """
+
+    def __init__(self, num_envs, workers=0, **options):
+        self.num_envs = num_envs
+        # No more workers than environments, an empty share would have nothing to stack
+        self.chunks = np.array_split(np.arange(num_envs), max(min(workers, num_envs), 1))
+        self.connections, self.processes = [], []
+        if workers == 0:
+            self.batch = Batch([Environment(**options) for _ in range(num_envs)])
+            return
+        self.batch = None
+        for chunk in self.chunks:
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=work, args=(child, len(chunk), options), daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+
+    def call(self, command, data):
+        if self.batch is not None:
+            return [getattr(self.batch, command)(data)]
+        for connection, chunk in zip(self.connections, self.chunks):
+            connection.send((command, [data[i] for i in chunk]))
+        return [connection.recv() for connection in self.connections]
+
+    def reset(self, seed=None):
+        seeds = [None if seed is None else seed + i for i in range(self.num_envs)]
+        return np.concatenate(self.call("reset", seeds))
+
+    def step(self, actions):
+        results = self.call("step", list(actions))
+        info = {"final_observation": {}, "final_score": {}}
+        for chunk, (*_, chunk_info) in zip(self.chunks, results):
+            for key in info:
+                info[key].update({int(chunk[i]): value for i, value in chunk_info[key].items()})
+        observations, rewards, terminated, truncated = (np.concatenate(column) for column in list(zip(*results))[:4])
+        return observations, rewards, terminated, truncated, info
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(("close", None))
+            connection.close()
+        for process in self.processes:
+            process.join()
+        self.connections, self.processes = [], []
@@ -3,6 +3,9 @@ import random
 import pygame
 import sys
 
+from Engine import wrap
+from Renderer import DirtyRects, color_surface
+
 
 # Constants
 SIZE = WIDTH, HIGHT = 1080, 720
@@ -11,34 +14,26 @@ BLACK, WHITE, RED, GREEN, BLUE, GREY = (
 BLOB_NB, BLOB_SIZE, PLAYER_SIZE = 500, 10, 20
 VELOCITY = 1
 FPS = 60
+COLORS = [GREEN, BLUE, WHITE]
+STEPS = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (-1, -1)]
 
 
 class Blob(pygame.sprite.Sprite):
-    def __init__(self, x, y, width, height, velocity, step=None):
+    def __init__(self, x, y, width, height, velocity, step=None, color=None):
         super(Blob, self).__init__()
         self.velocity = velocity
-        self.image = pygame.Surface([width, height])
-        self.image.fill(random.choice([GREEN, BLUE, WHITE]))
+        self.image = color_surface(random.choice(COLORS) if color is None else color, width, height)
         self.rect = self.image.get_rect()
         self.rect.center = [x, y]
         if step is None:
-            self.step = random.choice(
-                [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (-1, -1)])
+            self.step = random.choice(STEPS)
         else:
             self.step = step
 
     def move(self, x, y):
         self.rect.x += int(x * self.velocity)
         self.rect.y += int(y * self.velocity)
-        if self.rect.midright[0] > WIDTH:
-            self.rect.center = [0 + BLOB_SIZE, self.rect.center[1]]
-        if self.rect.midleft[0] < 0:
-            self.rect.center = [WIDTH - BLOB_SIZE, self.rect.center[1]]
-
-        if self.rect.midbottom[1] > HIGHT:
-            self.rect.center = [self.rect.center[0], 0 + BLOB_SIZE]
-        if self.rect.midtop[1] < 0:
-            self.rect.center = [self.rect.center[0], HIGHT - BLOB_SIZE]
+        wrap(self.rect, WIDTH, HIGHT, BLOB_SIZE)
 
     def respawn(self):
         return Blob(self.rect.center[0], self.rect.center[1], BLOB_SIZE, BLOB_SIZE, -self.velocity, self.step)
@@ -52,8 +47,7 @@ class Player(pygame.sprite.Sprite):
     def __init__(self, x, y, width, height, color, velocity):
         super(Player, self).__init__()
         self.velocity = velocity
-        self.image = pygame.Surface([width, height])
-        self.image.fill(color)
+        self.image = color_surface(color, width, height)
         self.rect = self.image.get_rect()
         self.rect.center = [x, y]
         self.score = 0
@@ -80,22 +74,29 @@ class Player(pygame.sprite.Sprite):
         self.rect.center = pygame.mouse.get_pos()
 
 
-def main():
+def main(seed=None, dirty=False):
     # Setting up Pygame
     pygame.init()
     screen = pygame.display.set_mode(SIZE)
     clock = pygame.time.Clock()
     pygame.display.set_caption("Eat me")
     font = pygame.font.SysFont("timesnewroman", 22)
+    # Only erase, redraw and update the screen where sprites were or are
+    dirty_rects = DirtyRects(screen, BLACK) if dirty else None
 
     # Player
     player = pygame.sprite.GroupSingle()
     player.add(Player(200, 200, PLAYER_SIZE, PLAYER_SIZE, RED, VELOCITY))
 
-    # Blobs
+    # Blobs, every random value drawn in one batch from a seeded generator
+    rng = np.random.default_rng(seed)
+    x = rng.integers(0, WIDTH, BLOB_NB).tolist()
+    y = rng.integers(0, HIGHT, BLOB_NB).tolist()
+    steps = rng.integers(0, len(STEPS), BLOB_NB).tolist()
+    colors = rng.integers(0, len(COLORS), BLOB_NB).tolist()
     blobs = pygame.sprite.Group()
-    blobs.add([Blob(np.random.randint(0, WIDTH), np.random.randint(
-        0, HIGHT), BLOB_SIZE, BLOB_SIZE, VELOCITY) for _ in range(BLOB_NB)])
+    blobs.add([Blob(x[i], y[i], BLOB_SIZE, BLOB_SIZE, VELOCITY, STEPS[steps[i]], COLORS[colors[i]])
+               for i in range(BLOB_NB)])
 
     # The main loop
     while True:
@@ -113,15 +114,22 @@ def main():
             player.sprite.score += 1
 
         # Drawing to the screen
-        screen.fill(BLACK)
-        blobs.draw(screen)
-        player.draw(screen)
+        if dirty_rects is None:
+            screen.fill(BLACK)
+            blobs.draw(screen)
+            player.draw(screen)
+        else:
+            dirty_rects.draw(blobs, player)
         surface = font.render(f"Score: {player.sprite.score}", True, WHITE)
         rect = surface.get_rect(center=(WIDTH // 2, 20))
         pygame.draw.rect(screen, BLACK, rect)
         screen.blit(surface, rect)
 
-        pygame.display.update()
+        if dirty_rects is None:
+            pygame.display.update()
+        else:
+            dirty_rects.overlay(rect)
+            pygame.display.update(dirty_rects.flush())
         clock.tick(60)
 
 
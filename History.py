@@ -0,0 +1,150 @@
+import numpy as np
+
+
+class History:
+    """Columnar history of a simulation backed by one preallocated NumPy array.
+
+    A row is kept every `interval` ticks. With a `sink` the buffer is flushed
+    to it every `capacity` rows, so memory stays bounded and the buffer only
+    holds the rows not written yet. With `ring=True` only the last `capacity`
+    rows are kept, for runs of unbounded length, otherwise the buffer doubles
+    when full. Every appended tick, sampled or not, also feeds a running
+    per-day mean.
+    """
+
+    def __init__(self, columns, capacity=1024, interval=1, ring=False, sink=None):
+        self.columns = list(columns)
+        self.interval = interval
+        self.sink = sink
+        self.ring = ring and sink is None
+        self.data = np.zeros((max(1, capacity), len(self.columns)), dtype=np.int64)
+        self.size = 0
+        self.total = 0
+        self.ticks = 0
+        self.latest = {}
+        self.closed = False
+
+        # Per-day aggregation, closed every time the first column (the day) changes
+        self.day = None
+        self.day_sum = np.zeros(len(self.columns) - 1, dtype=np.int64)
+        self.day_count = 0
+        self.days = []
+        self.day_means = np.zeros((16, len(self.columns) - 1))
+
+    def __len__(self):
+        return self.size
+
+    def keys(self):
+        return list(self.columns)
+
+    def __getitem__(self, column):
+        # Zero-copy view of one column, in chronological order unless the ring wrapped
+        index = self.columns.index(column)
+        if self.ring and self.total > self.size:
+            return self.rows()[:, index]
+        return self.data[:self.size, index]
+
+    def append(self, row):
+        self.latest = dict(zip(self.columns, row))
+        self.aggregate(row)
+
+        self.ticks += 1
+        if (self.ticks - 1) % self.interval:
+            return
+
+        if self.ring:
+            self.data[self.total % len(self.data)] = row
+            self.size = min(self.size + 1, len(self.data))
+        else:
+            if self.size == len(self.data) and self.sink is not None:
+                self.flush()
+            elif self.size == len(self.data):
+                self.data = np.concatenate([self.data, np.zeros_like(self.data)])
+            self.data[self.size] = row
+            self.size += 1
+        self.total += 1
+
+    def flush(self):
+        # Write the buffered rows to the sink and reuse the buffer
+        if self.sink is not None and self.size:
+            self.sink.write(self.data[:self.size])
+            self.size = 0
+
+    def close(self):
+        self.close_day()
+        self.flush()
+        if self.sink is not None and not self.closed:
+            self.sink.close()
+        self.closed = True
+
+    def aggregate(self, row):
+        day, values = row[0], row[1:]
+        if day != self.day:
+            self.close_day()
+            self.day = day
+        self.day_sum += values
+        self.day_count += 1
+
+    def close_day(self):
+        if not self.day_count:
+            return
+        if len(self.days) == len(self.day_means):
+            self.day_means = np.concatenate([self.day_means, np.zeros_like(self.day_means)])
+        self.day_means[len(self.days)] = self.day_sum / self.day_count
+        self.days.append(self.day)
+        self.day_sum[:] = 0
+        self.day_count = 0
+
+    def get_state(self):
+        """Everything but the sink, the rows already written stay in its file."""
+        return {
+            "data": (self.data if self.ring else self.data[:self.size]).copy(),
+            "capacity": len(self.data),
+            "size": self.size,
+            "total": self.total,
+            "written": self.total - self.size if self.sink is not None else 0,
+            "ticks": self.ticks,
+            "latest": {column: int(value) for column, value in self.latest.items()},
+            "day": None if self.day is None else int(self.day),
+            "day_sum": self.day_sum.copy(),
+            "day_count": self.day_count,
+            "days": [int(day) for day in self.days],
+            "day_means": self.day_means[:len(self.days)].copy(),
+        }
+
+    def set_state(self, state):
+        self.data = np.zeros((state["capacity"], len(self.columns)), dtype=np.int64)
+        self.data[:len(state["data"])] = state["data"]
+        self.size, self.total, self.ticks = state["size"], state["total"], state["ticks"]
+        self.latest = dict(state["latest"])
+        self.day, self.day_count = state["day"], state["day_count"]
+        self.day_sum = np.array(state["day_sum"], dtype=np.int64)
+        self.days = list(state["days"])
+        self.day_means = np.zeros((max(16, 2 * len(self.days)), len(self.columns) - 1))
+        self.day_means[:len(self.days)] = state["day_means"]
+
+    def rows(self):
+        if self.ring and self.total > self.size:
+            # The ring wrapped: oldest row first, this one has to copy
+            return np.roll(self.data, -(self.total % len(self.data)), axis=0)
+        return self.data[:self.size]
+
+    def row_ticks(self):
+        """Tick of every row of rows(), the first appended row being tick 0."""
+        # Rows dropped by the ring or already written to the sink come first
+        return np.arange(self.total - self.size, self.total) * self.interval
+
+    def frame(self):
+        """Sampled rows as a DataFrame sharing memory with the buffer."""
+        import pandas as pd
+        return pd.DataFrame(self.rows(), columns=self.columns, copy=False)
+
+    def daily(self):
+        """Mean of every column per day, including the day still in progress."""
+        import pandas as pd
+        days, means = list(self.days), self.day_means[:len(self.days)]
+        if self.day_count:
+            days.append(self.day)
+            means = np.vstack([means, self.day_sum / self.day_count])
+        return pd.DataFrame(means, columns=self.columns[1:],
+                            index=pd.Index(days, name=self.columns[0]))
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    """Rendered text surfaces keyed by content, the least recently used dropped first."""
+
+    def __init__(self, font, size=256):
+        self.font = font
+        self.size = size
+        self.surfaces = OrderedDict()
+
+    def render(self, text, color):
+        key = (text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.font.render(text, True, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.size:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+
+class Hud:
+    """Text and panels drawn only when their content changes.
+
+    Every named item remembers what it shows, a change erases the old rect,
+    blits the new text and records both as dirty. flush() hands the dirty
+    rects over for pygame.display.update(rects).
+    """
+
+    def __init__(self, screen, font, background=(0, 0, 0)):
+        self.screen = screen
+        self.cache = TextCache(font)
+        self.background = background
+        self.items = {}
+        self.dirty = []
+
+    def render(self, text, color=(255, 255, 255)):
+        return self.cache.render(text, color)
+
+    def text(self, name, text, center, color=(255, 255, 255)):
+        shown = self.items.get(name)
+        if shown is not None and shown[0] == (text, center, color):
+            return False
+        surface = self.render(text, color)
+        rect = surface.get_rect(center=center)
+        if shown is not None:
+            self.screen.fill(self.background, shown[1])
+            self.dirty.append(shown[1])
+        self.screen.fill(self.background, rect)
+        self.screen.blit(surface, rect)
+        self.items[name] = ((text, center, color), rect)
+        self.dirty.append(rect)
+        return True
+
+    def mark(self, rect):
+        self.dirty.append(pygame.Rect(rect))
+
+    def invalidate(self):
+        # Everything is drawn again on the next call, after the panel was repainted
+        self.items.clear()
+
+    def flush(self):
+        dirty, self.dirty = self.dirty, []
+        return dirty
@@ -0,0 +1,32 @@
+import logging
+import time
+
+
+class Throttle(logging.Filter):
+    """Lets every message through at most once every `interval` seconds.
+
+    Messages are told apart by their format string, so a call site logging
+    every tick can't starve the others. Warnings and errors always pass.
+    """
+
+    def __init__(self, interval=1.0):
+        super().__init__()
+        self.interval = interval
+        self.last = {}
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        now = time.monotonic()
+        last = self.last.get(record.msg)
+        if last is not None and now - last < self.interval:
+            return False
+        self.last[record.msg] = now
+        return True
+
+
+def throttled_logger(name, interval=1.0):
+    logger = logging.getLogger(name)
+    if not any(isinstance(f, Throttle) for f in logger.filters):
+        logger.addFilter(Throttle(interval))
+    return logger
@@ -0,0 +1,161 @@
+import numpy as np
+
+from SpatialGrid import expand_runs
+
+
+def disc_pairs(position, distance, size):
+    """Unique pairs (i, j) of points closer than distance inside a size box.
+
+    Broadphase on a dense grid of distance-sized cells: a counting sort gives
+    the run of points of every cell, and every point only looks at its own cell
+    and 4 of its neighbours, so each pair is found once.
+    """
+    nx, ny = (np.asarray(size) // distance).astype(np.int64) + 1
+    cx = np.clip((position[:, 0] // distance).astype(np.int64), 0, nx - 1)
+    cy = np.clip((position[:, 1] // distance).astype(np.int64), 0, ny - 1)
+    cell = cx * ny + cy
+    order = np.argsort(cell, kind="stable")
+    counts = np.bincount(cell, minlength=nx * ny)
+    starts = np.cumsum(counts) - counts
+
+    first, second = [], []
+    for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+        qx, qy = cx + dx, cy + dy
+        valid = (qx < nx) & (qy >= 0) & (qy < ny)
+        query = np.where(valid, qx * ny + qy, 0)
+        found = np.where(valid, counts[query], 0)
+        if not found.any():
+            continue
+        # Every (point, point in neighbour cell) pair
+        owner, run = expand_runs(starts[query], found)
+        other = order[run]
+        delta = position[owner] - position[other]
+        keep = np.einsum("ij,ij->i", delta, delta) < distance ** 2
+        if dx == 0 and dy == 0:
+            keep &= owner < other
+        first.append(owner[keep])
+        second.append(other[keep])
+    if not first:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(first), np.concatenate(second)
+
+
+class Disc:
+    """Handle on one disc of a DiscSpace, with the pymunk.Body attributes a Blob reads."""
+
+    def __init__(self, space, index):
+        self.space = space
+        self.index = index
+
+    @property
+    def position(self):
+        return self.space.positions[self.index]
+
+    @property
+    def velocity(self):
+        return tuple(self.space.velocity[self.index])
+
+
+class DiscSpace:
+    """Equal-radius, equal-mass elastic discs bouncing inside a width x height box.
+
+    A drop-in for the pymunk.Space of AdvanceCovidSimulation in this special
+    case: positions and velocities are NumPy arrays, contacts come from a
+    broadphase grid and every impulse of a step is resolved in one batch.
+    Walls are the four box edges, `wall_radius` thick like the pymunk segments.
+    """
+
+    def __init__(self, width, height, radius, wall_radius=5, capacity=1024):
+        self.size_box = np.array([width, height], dtype=np.float64)
+        self.radius = radius
+        self.low = wall_radius + radius
+        self.high = np.array([width, height], dtype=np.float64) - self.low
+        self.position = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.size = 0
+        # Plain Python copy of the positions, refreshed every step for the Blob reads
+        self.positions = []
+
+    def body(self, x, y, velocity):
+        # Reserve a disc, it only moves once added to the space
+        if self.size == len(self.position):
+            self.position = np.concatenate([self.position, np.zeros_like(self.position)])
+            self.velocity = np.concatenate([self.velocity, np.zeros_like(self.velocity)])
+            self.alive = np.concatenate([self.alive, np.zeros_like(self.alive)])
+        self.position[self.size] = x, y
+        self.velocity[self.size] = velocity
+        self.positions.append((float(x), float(y)))
+        self.size += 1
+        return Disc(self, self.size - 1)
+
+    def add(self, *objects):
+        for disc in objects:
+            if isinstance(disc, Disc):
+                self.alive[disc.index] = True
+
+    def remove(self, *objects):
+        for disc in objects:
+            if isinstance(disc, Disc):
+                self.alive[disc.index] = False
+
+    def get_state(self):
+        return {"position": self.position[:self.size].copy(), "velocity": self.velocity[:self.size].copy(),
+                "alive": self.alive[:self.size].copy()}
+
+    def set_state(self, state):
+        # Discs handed out before keep their index, Disc(space, i) reads the restored arrays
+        self.size = len(state["position"])
+        capacity = max(len(self.position), self.size)
+        self.position = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.position[:self.size] = state["position"]
+        self.velocity[:self.size] = state["velocity"]
+        self.alive[:self.size] = state["alive"]
+        self.positions = self.position[:self.size].tolist()
+
+    def step(self, dt):
+        alive = np.flatnonzero(self.alive[:self.size])
+        position, velocity = self.position[alive], self.velocity[alive]
+        position += velocity * dt
+
+        # Walls: mirror anything past an edge back inside and point it inwards
+        low, high = position < self.low, position > self.high
+        position[low] = 2 * self.low - position[low]
+        velocity[low] = np.abs(velocity[low])
+        position[high] = (2 * self.high - position)[high]
+        velocity[high] = -np.abs(velocity[high])
+        np.clip(position, self.low, self.high, out=position)
+
+        # Disc contacts from the broadphase grid
+        first, second = disc_pairs(position, 2 * self.radius, self.size_box)
+        if len(first):
+            delta = position[second] - position[first]
+            distance = np.hypot(delta[:, 0], delta[:, 1])
+            normal = np.where(distance[:, None] > 0, delta / np.maximum(distance, 1e-12)[:, None], [1.0, 0.0])
+
+            # Push overlapping discs apart, half the overlap each
+            push = normal * ((2 * self.radius - distance) / 2)[:, None]
+            np.add.at(position, first, -push)
+            np.add.at(position, second, push)
+            np.clip(position, self.low, self.high, out=position)
+
+            # Impulses in rounds of disjoint pairs, each disc takes its lowest
+            # pair per round, so energy and momentum are conserved exactly
+            pair = np.arange(len(first))
+            while len(pair):
+                lowest = np.full(len(position), len(first))
+                np.minimum.at(lowest, first[pair], pair)
+                np.minimum.at(lowest, second[pair], pair)
+                chosen = (lowest[first[pair]] == pair) & (lowest[second[pair]] == pair)
+                i, j, n = first[pair[chosen]], second[pair[chosen]], normal[pair[chosen]]
+                # Equal masses: swap the normal component of approaching pairs
+                approach = np.maximum(np.einsum("ij,ij->i", velocity[i] - velocity[j], n), 0)
+                impulse = n * approach[:, None]
+                velocity[i] -= impulse
+                velocity[j] += impulse
+                pair = pair[~chosen]
+
+        self.position[alive], self.velocity[alive] = position, velocity
+        self.positions = self.position[:self.size].tolist()
@@ -0,0 +1,82 @@
+from collections import deque
+import cProfile
+import pstats
+import time
+
+import numpy as np
+import pygame
+
+
+class Profiler:
+    """Times every phase of a main loop with perf_counter_ns.
+
+    Call tick() at the start of every tick and lap(phase) after every phase,
+    each phase keeps its last `window` timings for rolling percentiles. With
+    `profile_ticks` a cProfile of the ticks [profile_start, profile_start +
+    profile_ticks) is dumped to `profile_path`.
+    """
+
+    def __init__(self, window=600, profile_start=0, profile_ticks=0, profile_path="simulation.pstats"):
+        self.window = window
+        self.times = {}
+        self.ticks = 0
+        self.last = time.perf_counter_ns()
+
+        self.profile_start = profile_start
+        self.profile_stop = profile_start + profile_ticks
+        self.profile_path = profile_path
+        self.profile = cProfile.Profile() if profile_ticks else None
+        self.font = None
+
+    def tick(self):
+        if self.profile is not None:
+            if self.ticks == self.profile_start:
+                self.profile.enable()
+            elif self.ticks == self.profile_stop:
+                self.dump()
+        self.ticks += 1
+        self.last = time.perf_counter_ns()
+
+    def lap(self, phase):
+        now = time.perf_counter_ns()
+        if phase not in self.times:
+            self.times[phase] = deque(maxlen=self.window)
+        self.times[phase].append(now - self.last)
+        self.last = now
+
+    def dump(self):
+        # Stop the cProfile window and write its stats, sorted by cumulative time
+        self.profile.disable()
+        stats = pstats.Stats(self.profile)
+        stats.sort_stats("cumulative").dump_stats(self.profile_path)
+        self.profile = None
+
+    def close(self):
+        if self.profile is not None:
+            self.dump()
+
+    def percentiles(self, q=(50, 95, 99)):
+        """Rolling percentiles of every phase in milliseconds."""
+        return {phase: np.percentile(np.fromiter(times, dtype=np.int64), q) / 1e6
+                for phase, times in self.times.items() if times}
+
+    def report(self, q=(50, 95, 99)):
+        header = f"{'phase':<12}" + "".join(f"{f'p{p}':>10}" for p in q)
+        rows = [f"{phase:<12}" + "".join(f"{value:>8.3f}ms" for value in values)
+                for phase, values in self.percentiles(q).items()]
+        return "\n".join([header] + rows)
+
+    def draw(self, screen, bottomright, color=(255, 255, 255)):
+        # On-screen overlay: median and p95 of every phase, returns the drawn rects
+        if self.font is None:
+            self.font = pygame.font.SysFont("timesnewroman", 14)
+        lines = [f"{phase}: {p50:.2f} / {p95:.2f} ms"
+                 for phase, (p50, p95) in self.percentiles((50, 95)).items()]
+        right, bottom = bottomright
+        rects = []
+        for line in reversed(lines):
+            surface = self.font.render(line, True, color)
+            rect = surface.get_rect(bottomright=(right, bottom))
+            rects.append(screen.blit(surface, rect))
+            bottom = rect.top
+        return rects
@@ -0,0 +1,177 @@
+import numpy as np
+import pygame
+
+# One pre-filled surface per colour and size, shared by every sprite
+SURFACES = {}
+
+
+def color_surface(color, width, height):
+    key = (color, width, height)
+    if key not in SURFACES:
+        SURFACES[key] = pygame.Surface([width, height])
+        SURFACES[key].fill(color)
+    return SURFACES[key]
+
+
+def spread(owner, size, axis):
+    # owner[i] = max(owner[i - k] for k < size) along axis, in log2(size) shifts
+    width = 1
+    while width < size:
+        step = min(width, size - width)
+        head = [slice(None)] * owner.ndim
+        tail = [slice(None)] * owner.ndim
+        head[axis], tail[axis] = slice(step, None), slice(None, -step)
+        np.maximum(owner[tuple(head)], owner[tuple(tail)], out=owner[tuple(head)])
+        width += step
+
+
+class SquareRenderer:
+    """Draws every agent as a size x size square in one pass, no sprite per agent.
+
+    Agents are given as arrays of top-left corners and palette indices, later
+    agents are drawn over earlier ones like Group.draw. Small populations go
+    through one batched blits call of shared square surfaces. Large ones are
+    rasterized into an owner map (the index of the topmost agent of every
+    pixel) grown to full squares by shifted maxima, then written through a
+    surfarray view of the surface, so the cost stops growing with population.
+    """
+
+    def __init__(self, size, palette):
+        self.size = size
+        self.palette = palette
+        self.squares = []
+        self.mapped = None
+        self.surface = None
+        self.owner = None
+
+    def prepare(self, surface):
+        # Palette in the pixel format of the target surface, one shared square per colour
+        if surface is not self.surface:
+            self.mapped = np.array([surface.map_rgb(color) for color in self.palette], dtype=np.int64)
+            self.squares = []
+            for color in self.palette:
+                square = pygame.Surface((self.size, self.size))
+                square.fill(color)
+                self.squares.append(square)
+            self.surface = surface
+
+    def draw(self, surface, x, y, colors, area=None):
+        """Draw squares at (x, y) with palette indices colors, clipped to area."""
+        if len(x) == 0:
+            return
+        self.prepare(surface)
+        area = pygame.Rect(area or surface.get_rect())
+        if len(x) * self.size ** 2 < 4 * area.width * area.height:
+            self.blit(surface, x, y, colors, area)
+        else:
+            self.rasterize(surface, np.asarray(x), np.asarray(y), np.asarray(colors), area)
+
+    def blit(self, surface, x, y, colors, area):
+        squares = self.squares
+        previous = surface.get_clip()
+        surface.set_clip(area)
+        surface.blits([(squares[color], (left, top)) for left, top, color
+                       in zip(np.asarray(x).tolist(), np.asarray(y).tolist(), np.asarray(colors).tolist())],
+                      doreturn=False)
+        surface.set_clip(previous)
+
+    def rasterize(self, surface, x, y, colors, area):
+        size = self.size
+        # Owner map padded by one square on the top-left so clipped squares stay exact
+        shape = (area.width + size, area.height + size)
+        if self.owner is None or self.owner.shape != shape:
+            self.owner = np.empty(shape, dtype=np.int32)
+        owner = self.owner
+        owner.fill(-1)
+
+        x, y = x - area.left + size, y - area.top + size
+        inside = (x > 0) & (x < shape[0]) & (y > 0) & (y < shape[1])
+        index = np.flatnonzero(inside)
+        # Later agents overwrite earlier ones at the same corner, as with blits
+        owner[x[index], y[index]] = index
+        spread(owner, size, 0)
+        spread(owner, size, 1)
+
+        owner = owner[size:, size:]
+        drawn = owner >= 0
+        pixels = pygame.surfarray.pixels2d(surface)
+        try:
+            view = pixels[area.left:area.right, area.top:area.bottom]
+            view[drawn] = self.mapped[colors[owner[drawn]]].astype(pixels.dtype)
+        finally:
+            del pixels
+
+
+def dirty_tiles(x, y, size, area, tile=16):
+    """Rects covering every tile of area touched by a size x size square at (x, y).
+
+    Squares are at most a tile wide, so each touches at most 2 x 2 tiles.
+    Marked tiles are merged into horizontal runs, one rect per run, which keeps
+    the rect list short for pygame.display.update however many agents moved.
+    """
+    area = pygame.Rect(area)
+    nx, ny = -(-area.width // tile), -(-area.height // tile)
+    x, y = np.asarray(x) - area.left, np.asarray(y) - area.top
+    inside = (x + size > 0) & (x < area.width) & (y + size > 0) & (y < area.height)
+    x, y = x[inside], y[inside]
+    marked = np.zeros((ny, nx + 2), dtype=np.int8)
+    for cx in (x, x + size - 1):
+        for cy in (y, y + size - 1):
+            marked[np.clip(cy // tile, 0, ny - 1), np.clip(cx // tile, 0, nx - 1) + 1] = 1
+
+    # Run starts and ends of every row, in the same row-major order
+    edges = np.diff(marked, axis=1)
+    row, start = np.nonzero(edges == 1)
+    _, end = np.nonzero(edges == -1)
+    return [pygame.Rect(area.left + left * tile, area.top + top * tile, width * tile, tile).clip(area)
+            for top, left, width in zip(row.tolist(), start.tolist(), (end - start).tolist())]
+
+
+class DirtyRects:
+    """Erase-and-redraw bookkeeping for dirty-rect display updates.
+
+    Groups are erased where their sprites were drawn last frame (the rects
+    pygame.sprite.Group keeps in spritedict and lostsprites) and drawn again,
+    overlays such as text drawn on top are erased the next frame. flush() hands
+    over the changed rects for pygame.display.update(rects).
+    """
+
+    def __init__(self, surface, background=(0, 0, 0), area=None):
+        self.surface = surface
+        self.background = background
+        self.area = pygame.Rect(area or surface.get_rect())
+        self.rects = []
+        self.overlays = []
+
+    def erase(self, surface, rect):
+        # Group.clear callback, the background is a flat colour
+        surface.fill(self.background, rect)
+
+    def draw(self, *groups):
+        surface = self.surface
+        previous = surface.get_clip()
+        surface.set_clip(self.area)
+        for rect in self.overlays:
+            surface.fill(self.background, rect)
+        self.overlays = []
+
+        for group in groups:
+            self.rects += group.lostsprites
+            self.rects += [rect for rect in group.spritedict.values() if rect]
+            group.clear(surface, self.erase)
+        for group in groups:
+            group.draw(surface)
+            self.rects += [rect for rect in group.spritedict.values() if rect]
+        surface.set_clip(previous)
+
+    def overlay(self, *rects):
+        # Drawn on top this frame, erased before the next one
+        self.overlays += rects
+        self.rects += rects
+
+    def mark(self, *rects):
+        self.rects += rects
+
+    def flush(self):
+        rects, self.rects = self.rects, []
+        return rects
@@ -0,0 +1,29 @@
+class Scheduler:
+    """Calendar queue of events keyed by the tick they are due.
+
+    schedule(delay, event) files an event `delay` ticks after the current one,
+    advance() returns the events due at the current tick, in the order they
+    were scheduled, and moves on to the next tick. The work per tick is the
+    number of events due, not the number of agents waiting for one.
+    """
+
+    def __init__(self):
+        self.now = 0
+        self.calendar = {}
+
+    def schedule(self, delay, event):
+        if delay < 0:
+            raise ValueError("events can't be scheduled in the past")
+        self.calendar.setdefault(self.now + delay, []).append(event)
+
+    def advance(self):
+        due = self.calendar.pop(self.now, [])
+        self.now += 1
+        return due
+
+    def __len__(self):
+        return sum(len(events) for events in self.calendar.values())
+
+    def due(self):
+        # Tick every pending event is due, keyed by the event
+        return {event: tick for tick, events in self.calendar.items() for event in events}
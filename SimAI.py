@@ -1,24 +1,31 @@
-import matplotlib.pyplot as plt
-from matplotlib import rcParams
+import numpy as np
 import pygame
 import random
 import sys
 
+from Engine import pyplot
+from Hud import TextCache
+from Renderer import DirtyRects, SquareRenderer, color_surface, dirty_tiles
+from SpatialGrid import StaticGrid
+
 # Colors
 BLACK, WHITE, RED, GREEN, BLUE, GREY = (
     0, 0, 0), (255, 255, 255), (255, 0, 0), (0, 255, 0), (0, 0, 255), (100, 100, 100)
 
 # AI constants
 AI_TOLERANCE = 2
+ACTIONS = [(0, 0), (0, 1), (0, -1), (1, 0),
+           (-1, 0), (1, 1), (-1, 1), (1, -1), (-1, -1)]
+PLAYER_SIZE, PLAYER_VELOCITY, FOOD_SIZE = 20, 2, 10
 
 
 class AI:
-    def __init__(self, fps):
-        self.actions = [(0, 0), (0, 1), (0, -1), (1, 0),
-                        (-1, 0), (1, 1), (-1, 1), (1, -1), (-1, -1)]
+    def __init__(self, fps, rng=None):
+        self.actions = ACTIONS
         self.fps = fps
+        self.rng = np.random.default_rng() if rng is None else rng
         self.tolerance = AI_TOLERANCE * self.fps
-        self.choice = random.randint(0, len(self.actions)-1)
+        self.choice = int(self.rng.integers(0, len(self.actions)))
         self.current_score = 0
         pass
 
@@ -29,25 +36,25 @@ class AI:
             self.tolerance -= 1
             if self.tolerance <= 0:
                 self.tolerance = AI_TOLERANCE * self.fps
-                self.choice = random.randint(0, len(self.actions)-1)
+                self.choice = int(self.rng.integers(0, len(self.actions)))
         x, y = self.actions[self.choice][0], self.actions[self.choice][1]
         return x, y
 
 
 class Player(pygame.sprite.Sprite):
-    def __init__(self, id, map_width, map_height, width, height, color, velocity, fps):
+    def __init__(self, id, map_width, map_height, width, height, color, velocity, fps, center=None, rng=None):
         super(Player, self).__init__()
         self.id = id
         self.velocity = velocity
-        self.image = pygame.Surface([width, height])
-        self.image.fill(color)
+        self.image = color_surface(color, width, height)
         self.rect = self.image.get_rect()
-        self.rect.center = [random.randint(
-            100, map_width - 100), random.randint(100, map_height - 100)]
+        if center is None:
+            center = [random.randint(100, map_width - 100), random.randint(100, map_height - 100)]
+        self.rect.center = center
         self.map_width = map_width
         self.map_height = map_height
         self.score = 0
-        self.brain = AI(fps)
+        self.brain = AI(fps, rng)
 
     def move(self, step):
         if self.rect.midright[0] + step[0] < self.map_width and self.rect.midleft[0] + step[0] > 0:
@@ -60,65 +67,103 @@ class Player(pygame.sprite.Sprite):
 
 
 class Food(pygame.sprite.Sprite):
-    def __init__(self, sim_size):
+    def __init__(self, sim_size, center=None):
         super(Food, self).__init__()
         self.height = 10
         self.width = 10
-        self.image = pygame.Surface([self.height, self.width])
-        self.image.fill(RED)
+        self.image = color_surface(RED, self.height, self.width)
         self.rect = self.image.get_rect()
-        self.rect.center = [random.randint(
-            self.width, sim_size[0] - self.width), random.randint(self.height, sim_size[1] - self.height)]
+        if center is None:
+            center = [random.randint(self.width, sim_size[0] - self.width),
+                      random.randint(self.height, sim_size[1] - self.height)]
+        self.rect.center = center
 
     def update(self):
         pass
 
 
 class Simulation(pygame.sprite.Sprite):
-    def __init__(self, height, width, runtime, fps=60, population_size=5, nb_food=10):
+    def __init__(self, height, width, runtime, fps=60, population_size=5, nb_food=10, seed=None, dirty=False, headless=False):
+        # Every random draw of the simulation comes from this generator
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
         self.size = (height, width)
         self.simulation_time = runtime * fps
         self.fps = fps
         self.nb_food = nb_food
         self.population_size = population_size
+        # Only erase, redraw and update the screen where sprites were or are
+        self.dirty = dirty
+        # Headless runs never open a window
+        self.headless = headless
 
     def initialize(self):
-        # Setting up Pygame
-        pygame.init()
-        self.font = pygame.font.SysFont("timesnewroman", 22)
-        self.screen = pygame.display.set_mode(
-            self.size)  # , pygame.FULLSCREEN)
-        self.clock = pygame.time.Clock()
-        pygame.display.set_caption("AI Simulation")
+        if not self.headless:
+            self.setup()
 
         # Simulation variables
         self.active = True
+        foods, players = self.spawn()
         self.foods = pygame.sprite.Group()
-        [self.foods.add(Food(self.size))
-         for o in range(self.nb_food)]
+        [self.foods.add(Food(self.size, center))
+         for center in foods.tolist()]
         self.players = pygame.sprite.Group()
         [self.players.add(Player(
             id=i + 1,
             map_width=self.size[0], map_height=self.size[1],
-            width=20, height=20, color=GREEN, velocity=2, fps=self.fps
-        )) for i in range(self.population_size)]
+            width=PLAYER_SIZE, height=PLAYER_SIZE, color=GREEN, velocity=PLAYER_VELOCITY, fps=self.fps,
+            center=center, rng=self.rng
+        )) for i, center in enumerate(players.tolist())]
+
+    def setup(self):
+        # Setting up Pygame
+        pygame.init()
+        self.font = pygame.font.SysFont("timesnewroman", 22)
+        self.text = TextCache(self.font)
+        self.screen = pygame.display.set_mode(
+            self.size)  # , pygame.FULLSCREEN)
+        self.clock = pygame.time.Clock()
+        pygame.display.set_caption("AI Simulation")
+        self.dirty_rects = DirtyRects(self.screen, BLACK) if self.dirty else None
+
+    def spawn(self):
+        # Food and player centers, each drawn in one batch from the simulation generator
+        foods = np.stack([self.rng.integers(10, self.size[0] - 10, self.nb_food, endpoint=True),
+                          self.rng.integers(10, self.size[1] - 10, self.nb_food, endpoint=True)], 1)
+        players = np.stack([self.rng.integers(100, self.size[0] - 100, self.population_size, endpoint=True),
+                            self.rng.integers(100, self.size[1] - 100, self.population_size, endpoint=True)], 1)
+        return foods, players
 
     def draw(self):
+        if self.dirty_rects is not None:
+            self.dirty_rects.draw(self.players, self.foods)
+            return
+
         self.screen.fill(BLACK)
         self.players.draw(self.screen)
         self.foods.draw(self.screen)
 
+    def scores(self):
+        # (id, score) of every player, in id order
+        return [(player.id, player.score) for player in self.players]
+
     def stats(self, ticker):
         stat = f"Time: {ticker // self.fps} | "
-        for player in self.players:
-            stat += f"Player {player.id}: {player.score} || "
-        surface = self.font.render(
-            stat,
-            True, WHITE
-        )
+        scores = self.scores()
+        if len(scores) <= 10:
+            for id, score in scores:
+                stat += f"Player {id}: {score} || "
+        else:
+            # Too many players for one line
+            stat += f"Players: {len(scores)} || Best: {max(score for _, score in scores)} || " \
+                    f"Total: {sum(score for _, score in scores)}"
+        # The line only changes once a second or on a score, render it once per change
+        surface = self.text.render(stat, WHITE)
         rect = surface.get_rect(center=(self.size[0] // 2, 20))
         pygame.draw.rect(self.screen, BLACK, rect)
         self.screen.blit(surface, rect)
+        if self.dirty_rects is not None:
+            self.dirty_rects.overlay(rect)
 
     def update(self):
         self.foods.update()
@@ -131,6 +176,8 @@ class Simulation(pygame.sprite.Sprite):
     def run(self):
         # Initialize the simulation
         self.initialize()
+        if self.headless:
+            return self.run_headless()
         ticker = 0
 
         # The main loop
@@ -156,21 +203,141 @@ class Simulation(pygame.sprite.Sprite):
             self.stats(ticker)
             ticker += 1
 
-            pygame.display.update()
+            if self.dirty_rects is None:
+                pygame.display.update()
+            else:
+                pygame.display.update(self.dirty_rects.flush())
             self.clock.tick(self.fps)
 
         self.stop()
 
+    def run_headless(self):
+        # No drawing and no frame limiter, returns the (id, score) of every player
+        for _ in range(self.simulation_time):
+            self.update()
+            self.check_collision()
+        return self.scores()
+
     def stop(self):
         pygame.quit()
-        for player in self.players:
-            plt.bar(player.id, player.score, label=f'Player {player.id}')
-        plt.legend()
+        plt = pyplot()
+        scores = self.scores()
+        if len(scores) <= 10:
+            for id, score in scores:
+                plt.bar(id, score, label=f'Player {id}')
+            plt.legend()
+        else:
+            ids, values = zip(*scores)
+            plt.bar(ids, values)
         plt.show()
         sys.exit()
 
 
+class ArraySimulation(Simulation):
+    """Batched engine: the AI state and rect of every player live in NumPy arrays.
+
+    Food sits in a StaticGrid and a tick is one vectorized AI step, move and
+    collision pass for the whole population, with the same rules, order and
+    random draws as the sprite engine, so a seed gives the same scores.
+    """
+
+    def initialize(self):
+        if not self.headless:
+            self.setup()
+
+        # Simulation variables
+        self.active = True
+        foods, players = self.spawn()
+        n = self.population_size
+        self.ids = np.arange(1, n + 1)
+        # Rect top-left corners, exactly what pygame stores for a Player / Food
+        self.x = players[:, 0] - PLAYER_SIZE // 2
+        self.y = players[:, 1] - PLAYER_SIZE // 2
+        self.score = np.zeros(n, dtype=np.int64)
+        # AI columns: best reward seen, ticks left before a new action, action index
+        self.current_score = np.zeros(n, dtype=np.int64)
+        self.tolerance = np.full(n, AI_TOLERANCE * self.fps, dtype=np.int64)
+        self.choice = self.rng.integers(0, len(ACTIONS), n)
+        self.actions = np.array(ACTIONS, dtype=np.int64)
+        self.foods = StaticGrid(foods[:, 0] - FOOD_SIZE // 2, foods[:, 1] - FOOD_SIZE // 2,
+                                FOOD_SIZE, max(PLAYER_SIZE, FOOD_SIZE))
+
+        self.player_renderer = SquareRenderer(PLAYER_SIZE, (GREEN,))
+        self.food_renderer = SquareRenderer(FOOD_SIZE, (RED,))
+        self.colors = np.zeros(max(n, self.nb_food), dtype=np.uint8)
+        # Dirty mode: the players and foods drawn last frame, erased with black squares
+        self.player_eraser = SquareRenderer(PLAYER_SIZE, (BLACK,))
+        self.food_eraser = SquareRenderer(FOOD_SIZE, (BLACK,))
+        self.drawn = None
+
+    def scores(self):
+        return list(zip(self.ids.tolist(), self.score.tolist()))
+
+    def update(self):
+        self.move(self.think())
+
+    def think(self):
+        # AI.take_action for every player at once, returns the action indices
+        better = self.score > self.current_score
+        self.current_score[better] = self.score[better]
+        self.tolerance[~better] -= 1
+        expired = np.flatnonzero(~better & (self.tolerance <= 0))
+        self.tolerance[expired] = AI_TOLERANCE * self.fps
+        # One batch, the same values as a draw per player in id order
+        self.choice[expired] = self.rng.integers(0, len(ACTIONS), len(expired))
+        return self.choice
+
+    def move(self, choice):
+        # Player.move: each axis only moves if the rect stays inside the map
+        dx, dy = self.actions[choice].T
+        inside = (self.x + PLAYER_SIZE + dx < self.size[0]) & (self.x + dx > 0)
+        self.x[inside] += dx[inside] * PLAYER_VELOCITY
+        inside = (self.y + PLAYER_SIZE + dy < self.size[1]) & (self.y + dy > 0)
+        self.y[inside] += dy[inside] * PLAYER_VELOCITY
+
+    def check_collision(self):
+        # Returns the foods eaten this tick
+        players, foods = self.foods.pairs(self.x, self.y, PLAYER_SIZE)
+        if len(players) == 0:
+            return foods
+        # As groupcollide in id order: a food goes to the first player on it,
+        # a player scores once per tick however many foods it eats
+        first = np.full(self.nb_food, self.population_size)
+        np.minimum.at(first, foods, players)
+        self.score[np.unique(players[first[foods] == players])] += 1
+        foods = np.unique(foods)
+        self.foods.remove(foods)
+        return foods
+
+    def draw(self):
+        alive = np.flatnonzero(self.foods.alive)
+        screen = self.screen.get_rect()
+        if self.dirty_rects is None:
+            self.screen.fill(BLACK)
+        else:
+            # Erase last frame's overlays, players and the foods eaten since
+            self.dirty_rects.draw()
+            x, y = self.x, self.y
+            if self.drawn is not None:
+                x, y, shown = self.drawn
+                eaten = shown[~self.foods.alive[shown]]
+                self.player_eraser.draw(self.screen, x, y, self.colors[:len(x)])
+                self.food_eraser.draw(self.screen, self.foods.x[eaten], self.foods.y[eaten],
+                                      self.colors[:len(eaten)])
+                self.dirty_rects.mark(*dirty_tiles(self.foods.x[eaten], self.foods.y[eaten],
+                                                   FOOD_SIZE, screen, 32))
+                x, y = np.concatenate([x, self.x]), np.concatenate([y, self.y])
+            self.dirty_rects.mark(*dirty_tiles(x, y, PLAYER_SIZE, screen, 32))
+            self.drawn = self.x.copy(), self.y.copy(), alive
+
+        # Players then foods, the order of the sprite engine
+        self.player_renderer.draw(self.screen, self.x, self.y, self.colors[:len(self.x)])
+        self.food_renderer.draw(self.screen, self.foods.x[alive], self.foods.y[alive],
+                                self.colors[:len(alive)])
+
+
 if __name__ == '__main__':
+    from matplotlib import rcParams
     rcParams["figure.figsize"] = 12, 8
     sim = Simulation(
         height=1080, width=720, runtime=20,
@@ -0,0 +1,125 @@
+import numpy as np
+
+# pyarrow and pandas are only imported by the sinks and loads that need them
+pa = pq = None
+
+
+def import_arrow():
+    # True once pyarrow is imported, False when it is not installed
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError:
+            return False
+        pa, pq = pyarrow, pyarrow.parquet
+    return True
+
+
+class CSVSink:
+    """Appends history chunks to a CSV file, always available."""
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.file = open(path, "w")
+        self.file.write(",".join(columns) + "\n")
+
+    def write(self, rows):
+        np.savetxt(self.file, rows, fmt="%d", delimiter=",")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ArrowSink:
+    """Appends history chunks as record batches of an Arrow IPC file."""
+
+    def __init__(self, path, columns):
+        import_arrow()
+        self.path = path
+        self.columns = list(columns)
+        self.schema = pa.schema([(column, pa.int64()) for column in self.columns])
+        self.writer = pa.ipc.new_file(path, self.schema)
+
+    def batch(self, rows):
+        return pa.record_batch([pa.array(rows[:, i]) for i in range(len(self.columns))], schema=self.schema)
+
+    def write(self, rows):
+        self.writer.write_batch(self.batch(rows))
+
+    def close(self):
+        self.writer.close()
+
+
+class ParquetSink(ArrowSink):
+    """Appends history chunks as row groups of a Parquet file."""
+
+    def __init__(self, path, columns):
+        import_arrow()
+        self.path = path
+        self.columns = list(columns)
+        self.schema = pa.schema([(column, pa.int64()) for column in self.columns])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        self.writer.write_batch(self.batch(rows))
+
+
+def open_sink(path, columns):
+    """Sink for the file extension (.parquet, .arrow/.feather, .csv).
+
+    Falls back to CSV next to the requested file when pyarrow is not installed.
+    """
+    path = sink_path(path)
+    if path.endswith(".csv"):
+        return CSVSink(path, columns)
+    if path.endswith((".arrow", ".feather")):
+        return ArrowSink(path, columns)
+    return ParquetSink(path, columns)
+
+
+def sink_path(path):
+    # The file open_sink writes for path, CSV next to it when pyarrow is not installed
+    path = str(path)
+    if not path.endswith(".csv") and not import_arrow():
+        return path.rsplit(".", 1)[0] + ".csv"
+    return path
+
+
+def read_rows(path, count):
+    """The first count rows a sink wrote to path, as an int64 array.
+
+    Arrow and Parquet files can only be read once their sink was closed, CSV
+    files also after a crash.
+    """
+    path = sink_path(path)
+    if path.endswith(".csv"):
+        return np.loadtxt(path, dtype=np.int64, delimiter=",", skiprows=1, max_rows=count, ndmin=2)
+    try:
+        if path.endswith((".arrow", ".feather")):
+            with pa.memory_map(path) as source:
+                return columns(pa.ipc.open_file(source).read_all().slice(0, count))
+        return columns(pq.read_table(path).slice(0, count))
+    except pa.ArrowInvalid:
+        raise ValueError(f"{path} was not closed by its sink, its rows can't be read back") from None
+
+
+def columns(table):
+    # Copy of the table as a 2d int64 array, independent of the file it was read from
+    return np.column_stack([column.to_numpy() for column in table.columns]).astype(np.int64)
+
+
+def load(path):
+    """Read back a history written by any sink as a DataFrame."""
+    import pandas as pd
+    path = str(path)
+    if path.endswith(".csv"):
+        return pd.read_csv(path)
+    import_arrow()
+    if path.endswith((".arrow", ".feather")):
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).read_pandas()
+    return pd.read_parquet(path)
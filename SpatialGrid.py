@@ -0,0 +1,237 @@
+import numpy as np
+
+
+class SpatialGrid:
+    """Uniform grid of sprites bucketed by the cell of their rect's top-left corner.
+
+    With a cell size at least as large as every rect, two overlapping rects are
+    always in the same or neighbouring cells, so a query only looks at 3x3 cells.
+    """
+
+    def __init__(self, cell_size, sprites=()):
+        self.cell_size = cell_size
+        self.cells = {}
+        for sprite in sprites:
+            self.add(sprite)
+
+    def cell(self, rect):
+        return rect.x // self.cell_size, rect.y // self.cell_size
+
+    def add(self, sprite):
+        self.cells.setdefault(self.cell(sprite.rect), []).append(sprite)
+
+    def remove(self, sprite):
+        self.cells[self.cell(sprite.rect)].remove(sprite)
+
+    def collide(self, sprite):
+        # True if the sprite overlaps at least one sprite of the grid
+        rect = sprite.rect
+        cx, cy = self.cell(rect)
+        for x in (cx - 1, cx, cx + 1):
+            for y in (cy - 1, cy, cy + 1):
+                for other in self.cells.get((x, y), ()):
+                    if rect.colliderect(other.rect):
+                        return True
+        return False
+
+    def colliding(self, sprite):
+        # Every sprite of the grid the sprite overlaps
+        rect = sprite.rect
+        cx, cy = self.cell(rect)
+        return [other for x in (cx - 1, cx, cx + 1) for y in (cy - 1, cy, cy + 1)
+                for other in self.cells.get((x, y), ()) if rect.colliderect(other.rect)]
+
+    def groupcollide(self, group):
+        # Same keys as pygame.sprite.groupcollide(group, grid_sprites, False, False)
+        return [sprite for sprite in group if self.collide(sprite)]
+
+
+def expand_runs(starts, counts):
+    """Every element of the runs starts[i]:starts[i] + counts[i], without a Python loop.
+
+    Returns the run each element belongs to and its position, so owner[k] is i
+    for the counts[i] positions starts[i], starts[i] + 1, ... in turn.
+    """
+    owner = np.repeat(np.arange(len(counts)), counts)
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, np.repeat(starts, counts) + offset
+
+
+def neighbours(x, y, candidates, sources, cell_size):
+    # (owner, source) pairs of every candidate with the sources of each of its 9 neighbouring
+    # cells, one offset at a time: owner indexes candidates, source indexes x and y
+    sx, sy = (x[sources] // cell_size).astype(np.int64), (y[sources] // cell_size).astype(np.int64)
+    keys = (sx << 32) + sy
+    order = np.argsort(keys, kind="stable")
+    keys, sources = keys[order], np.asarray(sources)[order]
+
+    cx, cy = (x[candidates] // cell_size).astype(np.int64), (y[candidates] // cell_size).astype(np.int64)
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            query = ((cx + dx) << 32) + (cy + dy)
+            starts = np.searchsorted(keys, query, side="left")
+            counts = np.searchsorted(keys, query, side="right") - starts
+            if not counts.any():
+                continue
+            # Every (candidate, source in cell) pair
+            owner, position = expand_runs(starts, counts)
+            yield owner, sources[position]
+
+
+def grid_contacts(x, y, candidates, sources, size, cell_size=None, with_sources=False):
+    """Indices of candidates whose size x size box overlaps at least one source box.
+
+    Sources are sorted by cell key each call, then every candidate looks up the
+    run of sources in each of its 9 neighbouring cells, so the work grows with
+    the number of nearby pairs instead of |candidates| x |sources|. With
+    with_sources=True the lowest source index each of them overlaps comes too.
+    """
+    candidates = np.asarray(candidates)
+    if len(candidates) == 0 or len(sources) == 0:
+        return (candidates[:0], candidates[:0]) if with_sources else candidates[:0]
+    cell_size = size if cell_size is None else cell_size
+
+    hit = np.zeros(len(candidates), dtype=bool)
+    first = np.full(len(candidates), np.iinfo(np.int64).max) if with_sources else None
+    for owner, other in neighbours(x, y, candidates, sources, cell_size):
+        me = candidates[owner]
+        overlap = (np.abs(x[me] - x[other]) < size) & (np.abs(y[me] - y[other]) < size)
+        hit[owner[overlap]] = True
+        if with_sources:
+            np.minimum.at(first, owner[overlap], other[overlap])
+    if with_sources:
+        return candidates[hit], first[hit]
+    return candidates[hit]
+
+
+def grid_pairs(x, y, candidates, sources, radius):
+    """Every (candidate, source, distance) closer than radius, sorted by candidate then source.
+
+    The same cell lookup as grid_contacts with cells of the radius, keeping
+    each pair instead of one flag per candidate so a transmission model can
+    weigh them all at once.
+    """
+    candidates = np.asarray(candidates)
+    found = [(candidates[:0], candidates[:0], np.zeros(0, dtype=np.int64))]
+    if len(candidates) and len(sources):
+        for owner, other in neighbours(x, y, candidates, sources, radius):
+            me = candidates[owner]
+            dx = x[me].astype(np.int64) - x[other]
+            dy = y[me].astype(np.int64) - y[other]
+            # Squared integer distances filter the pairs, only those kept get a square root
+            squared = dx * dx + dy * dy
+            near = squared < radius * radius
+            found.append((me[near], other[near], squared[near]))
+    me, other, squared = (np.concatenate(column) for column in zip(*found))
+    # One sort of a combined key instead of a lexsort of both columns
+    order = np.argsort(me.astype(np.int64) * (int(max(other.max(initial=0), 0)) + 1) + other)
+    return me[order], other[order], np.sqrt(squared[order])
+
+
+class StaticGrid:
+    """Boxes that never move, bucketed once into a dense grid and only ever removed.
+
+    A counting sort at construction gives the run of boxes of every cell,
+    removing a box only clears its `alive` flag. Queries are boxes of another
+    size, with a cell size at least as large as both sizes every overlap is in
+    the 3x3 cells around the query.
+    """
+
+    def __init__(self, x, y, size, cell_size):
+        self.x, self.y = np.asarray(x), np.asarray(y)
+        self.size = size
+        self.cell_size = cell_size
+        self.alive = np.ones(len(self.x), dtype=bool)
+        self.nx = int(self.x.max(initial=0)) // cell_size + 1
+        self.ny = int(self.y.max(initial=0)) // cell_size + 1
+        cell = np.maximum(self.x // cell_size, 0) * self.ny + np.maximum(self.y // cell_size, 0)
+        self.order = np.argsort(cell, kind="stable")
+        self.counts = np.bincount(cell, minlength=self.nx * self.ny)
+        self.starts = np.cumsum(self.counts) - self.counts
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    def remove(self, boxes):
+        self.alive[boxes] = False
+
+    def pairs(self, x, y, size):
+        """(query, box) index pairs of size x size query boxes overlapping alive boxes."""
+        # The 3x3 cells around every query, all looked up in one pass
+        qx = (x // self.cell_size)[:, None] + np.array([-1, -1, -1, 0, 0, 0, 1, 1, 1])
+        qy = (y // self.cell_size)[:, None] + np.array([-1, 0, 1, -1, 0, 1, -1, 0, 1])
+        valid = (qx >= 0) & (qx < self.nx) & (qy >= 0) & (qy < self.ny)
+        query = np.where(valid, qx * self.ny + qy, 0).ravel()
+        counts = np.where(valid.ravel(), self.counts[query], 0)
+        if not counts.any():
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        # Every (query, box in cell) pair, 9 cells per query
+        owner, position = expand_runs(self.starts[query], counts)
+        owner, other = owner // 9, self.order[position]
+        # Strict overlap, as pygame.Rect.colliderect
+        keep = (self.alive[other]
+                & (x[owner] < self.x[other] + self.size) & (self.x[other] < x[owner] + size)
+                & (y[owner] < self.y[other] + self.size) & (self.y[other] < y[owner] + size))
+        return owner[keep], other[keep]
+
+
+class SparseTiles:
+    """Points bucketed by square tile, only the occupied tiles are stored.
+
+    build() sorts the points by tile key once, every occupied tile is then a
+    run of that order, so memory grows with the points and occupied tiles and
+    not with the area of the map. query() looks up the tiles overlapping a
+    rect, or scans the occupied ones when those are fewer, and returns the
+    points inside the rect in index order. The points are tested where they
+    are now: points that moved at most `margin` since build() are still found
+    by growing the looked-up tiles by margin.
+    """
+
+    def __init__(self, tile_size):
+        self.tile_size = tile_size
+        self.x = self.y = None
+        self.order = np.zeros(0, dtype=np.int64)
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.starts = np.zeros(1, dtype=np.int64)
+
+    def __len__(self):
+        # Occupied tiles
+        return len(self.keys)
+
+    def key(self, tx, ty):
+        # Tile row in the high bits, column offset to stay positive in the low ones
+        return (np.asarray(tx, dtype=np.int64) << 32) + (np.asarray(ty, dtype=np.int64) + (1 << 31))
+
+    def build(self, x, y):
+        self.x, self.y = x, y
+        keys = self.key(x // self.tile_size, y // self.tile_size)
+        # Order inside a tile doesn't matter, query() sorts what it returns
+        self.order = np.argsort(keys)
+        keys = keys[self.order]
+        # Run starts of the occupied tiles, then the end of the last run
+        starts = np.flatnonzero(np.r_[len(keys) > 0, keys[1:] != keys[:-1]])
+        self.keys = keys[starts]
+        self.starts = np.append(starts, len(keys))
+
+    def query(self, left, top, right, bottom, margin=0):
+        """Indices of the points with left <= x < right and top <= y < bottom, in index order."""
+        size = self.tile_size
+        tx = np.arange(int((left - margin) // size), int((right + margin) // size) + 1)
+        ty = np.arange(int((top - margin) // size), int((bottom + margin) // size) + 1)
+        if len(tx) * len(ty) < len(self.keys):
+            # Every tile of the rect, most of them empty on a sparse map
+            wanted = self.key(np.repeat(tx, len(ty)), np.tile(ty, len(tx)))
+            tiles = np.searchsorted(self.keys, wanted)
+            tiles = tiles[(tiles < len(self.keys)) & (self.keys[np.minimum(tiles, len(self.keys) - 1)] == wanted)]
+        else:
+            # Zoomed out: fewer occupied tiles than tiles in the rect
+            kx, ky = self.keys >> 32, (self.keys & 0xFFFFFFFF) - (1 << 31)
+            tiles = np.flatnonzero((kx >= tx[0]) & (kx <= tx[-1]) & (ky >= ty[0]) & (ky <= ty[-1]))
+        counts = self.starts[tiles + 1] - self.starts[tiles]
+        if not counts.any():
+            return np.zeros(0, dtype=np.int64)
+        # Every point of those tiles, then the exact rect
+        found = self.order[expand_runs(self.starts[tiles], counts)[1]]
+        x, y = self.x[found], self.y[found]
+        return np.sort(found[(x >= left) & (x < right) & (y >= top) & (y < bottom)])
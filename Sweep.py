@@ -0,0 +1,65 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import itertools
+import os
+
+
+def grid(**parameters):
+    """Every combination of the given constructor parameters, as a list of dicts.
+
+    grid(population_size=[400, 800], recovery_time=[5, 10]) gives 4 parameter sets.
+    """
+    names = list(parameters)
+    return [dict(zip(names, values)) for values in itertools.product(*parameters.values())]
+
+
+def run_one(simulation, parameters, seed):
+    # Each seed is its own numpy SeedSequence, so every run gets an independent,
+    # reproducible stream whatever worker it lands on
+    sim = simulation(**parameters, seed=seed, headless=True)
+    sim.initialize()
+    history = sim.run_headless()
+    ticks = history.row_ticks()
+    history = history.frame()
+    history.insert(0, "Tick", ticks)
+    return parameters, seed, history
+
+
+def sweep(simulation, parameter_sets, seeds, max_workers=None):
+    """Run every parameter set with every seed on a process pool.
+
+    Yields one (parameters, seed, history DataFrame) per run as soon as it finishes.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = [executor.submit(run_one, simulation, parameters, seed)
+                   for parameters in parameter_sets for seed in seeds]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_sweep(simulation, parameter_sets, seeds, max_workers=None):
+    """Combined history of a sweep, indexed by the parameters, the seed and the tick."""
+    import pandas as pd
+    keys = list(parameter_sets[0]) + ["seed", "Tick"]
+    tables = []
+    for parameters, seed, history in sweep(simulation, parameter_sets, seeds, max_workers):
+        for name, value in parameters.items():
+            history[name] = value
+        history["seed"] = seed
+        tables.append(history)
+    return pd.concat(tables, ignore_index=True).set_index(keys).sort_index()
+
+
+if __name__ == '__main__':
+    from CovidSimulation import ArraySimulation
+    results = run_sweep(
+        ArraySimulation,
+        grid(
+            population_size=[400, 800],
+            initial_infected=[1],
+            initial_suspected=[5],
+            simulation_time=[20],
+            recovery_time=[5, 10]
+        ),
+        seeds=range(10)
+    )
+    print(results.groupby(["population_size", "recovery_time", "Day"]).mean())
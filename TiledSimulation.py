@@ -0,0 +1,212 @@
+import multiprocessing
+import os
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from CovidSimulation import BLOB_SIZE, ArraySimulation, move_agents
+from SpatialGrid import grid_contacts, grid_pairs
+
+# Agent columns shared with the workers
+COLUMNS = tuple(ArraySimulation.COLUMNS)
+
+
+def share(arrays):
+    # Copies of the arrays in new shared memory blocks, and what other processes need to attach them
+    blocks, views, specs = [], {}, {}
+    for name, values in arrays.items():
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        views[name] = np.ndarray(values.shape, values.dtype, buffer=block.buf)
+        views[name][...] = values
+        specs[name] = (block.name, values.shape, values.dtype.str)
+        blocks.append(block)
+    return blocks, views, specs
+
+
+def release(blocks):
+    # Unlink first, the name in /dev/shm is what outlives the process. Views still
+    # alive at exit keep the mapping until the process ends
+    for block in blocks:
+        block.unlink()
+        try:
+            block.close()
+        except BufferError:
+            pass
+
+
+def attach(specs):
+    blocks, views = [], {}
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        views[name] = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+        blocks.append(block)
+    return blocks, views
+
+
+def tile_contacts(arrays, edges, tile, candidate, source, with_sources=False):
+    # Candidates whose rect starts in the strip, sources from the strip and a halo of one rect
+    # on both sides: every source that can overlap one of those candidates
+    x, y, state = arrays["x"], arrays["y"], arrays["state"]
+    left, right = edges[tile], edges[tile + 1]
+    inside = np.flatnonzero((x >= left) & (x < right) & (state == candidate))
+    halo = np.flatnonzero((x > left - BLOB_SIZE) & (x < right + BLOB_SIZE) & (state == source))
+    return grid_contacts(x, y, inside, halo, BLOB_SIZE, with_sources=with_sources)
+
+
+def tile_pairs(arrays, edges, tile, candidate, source, radius):
+    # Pairs of the candidates starting in the strip, sources from a halo of one radius around it
+    x, y, state = arrays["x"], arrays["y"], arrays["state"]
+    left, right = edges[tile], edges[tile + 1]
+    inside = np.flatnonzero((x >= left) & (x < right) & (state == candidate))
+    halo = np.flatnonzero((x > left - radius) & (x < right + radius) & (state == source))
+    return grid_pairs(x, y, inside, halo, radius)
+
+
+def merge_pairs(found):
+    # Pairs of several strips in (candidate, source) order
+    candidates, sources, distance = (np.concatenate(column) for column in zip(*found))
+    order = np.lexsort((sources, candidates))
+    return candidates[order], sources[order], distance[order]
+
+
+def merge(found, with_sources):
+    # Contacts of several strips in index order, strips never share a candidate
+    if not with_sources:
+        return np.sort(np.concatenate(found))
+    candidates, sources = (np.concatenate(column) for column in zip(*found))
+    order = np.argsort(candidates)
+    return candidates[order], sources[order]
+
+
+def work(connection, specs, edges, world):
+    # Worker side of TiledSimulation: run the commands of the parent on the shared columns
+    blocks, arrays = attach(specs)
+    while True:
+        command, data = connection.recv()
+        if command == "close":
+            break
+        if command == "move":
+            start, stop = data
+            move_agents(*(arrays[name][start:stop] for name in ("x", "y", "steps", "velocity")), *world)
+            connection.send(None)
+        elif command == "contacts":
+            tiles, candidate, source, with_sources = data
+            connection.send(merge([tile_contacts(arrays, edges, tile, candidate, source, with_sources)
+                                   for tile in tiles], with_sources))
+        elif command == "pairs":
+            tiles, candidate, source, radius = data
+            connection.send(merge_pairs([tile_pairs(arrays, edges, tile, candidate, source, radius)
+                                         for tile in tiles]))
+    arrays.clear()
+    for block in blocks:
+        block.close()
+    connection.close()
+
+
+class TiledSimulation(ArraySimulation):
+    """ArraySimulation stepped by worker processes over shared memory.
+
+    The agent columns live in multiprocessing.shared_memory blocks. Each tick
+    the workers move contiguous slices of the population, then find the
+    contacts of the plane cut into `tiles` vertical strips: the candidates
+    whose rect starts in a strip are tested against the sources of the strip
+    and of a halo one rect wide around it. Transitions, recoveries and the
+    history stay in this process, so a seed gives exactly the run of
+    ArraySimulation. workers=0 steps the strips in this process.
+    """
+
+    def __init__(self, *args, workers=None, tiles=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.parameters.update(workers=workers, tiles=tiles)
+        self.workers = os.cpu_count() if workers is None else workers
+        self.tiles = tiles or max(self.workers, 1)
+        # A worker without a strip would have no contacts to merge
+        self.workers = min(self.workers, self.tiles)
+        # Strip edges along x, the outer ones open so no agent falls outside
+        self.edges = np.array([np.iinfo(np.int64).min // 2]
+                              + [self.world_size[0] * i // self.tiles for i in range(1, self.tiles)]
+                              + [np.iinfo(np.int64).max // 2], dtype=np.int64)
+        self.blocks, self.shared = [], {}
+        self.connections, self.processes = [], []
+
+    def initialize(self):
+        super().initialize()
+        self.share()
+        if self.workers and not self.processes:
+            self.spawn_workers()
+
+    def set_agents(self, agents):
+        super().set_agents(agents)
+        self.share()
+
+    def share(self):
+        # Agent columns moved into the shared blocks, created on first use
+        if not self.blocks:
+            self.blocks, self.shared, self.specs = share({name: getattr(self, name) for name in COLUMNS})
+            # Released when the simulation is collected or at exit if close() is never called
+            self.release = weakref.finalize(self, release, self.blocks)
+        for name in COLUMNS:
+            self.shared[name][...] = getattr(self, name)
+            setattr(self, name, self.shared[name])
+
+    def spawn_workers(self):
+        bounds = np.linspace(0, self.population_size, self.workers + 1).astype(int).tolist()
+        self.chunks = list(zip(bounds[:-1], bounds[1:]))
+        self.assigned = [list(range(worker, self.tiles, self.workers)) for worker in range(self.workers)]
+        for _ in range(self.workers):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=work, args=(child, self.specs, self.edges, self.world_size), daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+
+    def move(self):
+        if not self.connections:
+            return super().move()
+        for connection, chunk in zip(self.connections, self.chunks):
+            connection.send(("move", chunk))
+        for connection in self.connections:
+            connection.recv()
+
+    def contacts(self, candidate, source, with_sources=False):
+        if not self.connections:
+            found = [tile_contacts(self.shared, self.edges, tile, candidate, source, with_sources)
+                     for tile in range(self.tiles)]
+        else:
+            for connection, tiles in zip(self.connections, self.assigned):
+                connection.send(("contacts", (tiles, candidate, source, with_sources)))
+            found = [connection.recv() for connection in self.connections]
+        # Sorted like the single-process contacts
+        return merge(found, with_sources)
+
+    def pairs(self, candidate, source, radius):
+        if not self.connections:
+            found = [tile_pairs(self.shared, self.edges, tile, candidate, source, radius)
+                     for tile in range(self.tiles)]
+        else:
+            for connection, tiles in zip(self.connections, self.assigned):
+                connection.send(("pairs", (tiles, candidate, source, radius)))
+            found = [connection.recv() for connection in self.connections]
+        return merge_pairs(found)
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(("close", None))
+            connection.close()
+        for process in self.processes:
+            process.join()
+        self.connections, self.processes = [], []
+        # The columns are copied out before the blocks are released
+        for name in COLUMNS:
+            if self.shared.get(name) is getattr(self, name, None):
+                setattr(self, name, self.shared[name].copy())
+        self.shared.clear()
+        if self.blocks:
+            self.release()
+        self.blocks = []
+
+    def stop(self):
+        self.close()
+        return super().stop()
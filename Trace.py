@@ -0,0 +1,97 @@
+import numpy as np
+
+from Sinks import open_sink
+
+
+class Trace:
+    """Append-only log of infection events, one int64 row each in a preallocated array.
+
+    A row is (tick, infector, infectee, x, y): the tick of the infection, the
+    ids of both agents and the position of the infectee. The agents infected
+    at the start are rows of tick 0 with infector -1, the roots of the
+    transmission tree. The buffer doubles when full, up to `size` rows when
+    given: later events are only counted in `dropped`, so the log never takes
+    more than size * 40 bytes.
+    """
+
+    COLUMNS = ["Tick", "Infector", "Infectee", "X", "Y"]
+
+    def __init__(self, size=None, capacity=1024):
+        self.size = size
+        self.data = np.zeros((max(1, capacity if size is None else min(capacity, size)), len(self.COLUMNS)),
+                             dtype=np.int64)
+        self.count = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self.count
+
+    def record(self, tick, infectors, infectees, x, y):
+        n = len(infectees)
+        if n == 0:
+            return
+        if self.count + n > len(self.data):
+            self.grow(self.count + n)
+        kept = min(n, len(self.data) - self.count)
+        self.dropped += n - kept
+        # Infectee order, whatever order the engine found the contacts in
+        order = np.argsort(infectees, kind="stable")[:kept]
+        rows = self.data[self.count:self.count + kept]
+        rows[:, 0] = tick
+        for column, values in enumerate((infectors, infectees, x, y), 1):
+            rows[:, column] = np.asarray(values)[order]
+        self.count += kept
+
+    def grow(self, needed):
+        capacity = max(needed, 2 * len(self.data))
+        if self.size is not None:
+            capacity = min(capacity, self.size)
+        if capacity > len(self.data):
+            data = np.zeros((capacity, len(self.COLUMNS)), dtype=np.int64)
+            data[:self.count] = self.data[:self.count]
+            self.data = data
+
+    def events(self):
+        """Recorded rows, a view of the buffer."""
+        return self.data[:self.count]
+
+    def frame(self):
+        import pandas as pd
+        return pd.DataFrame(self.events(), columns=self.COLUMNS, copy=False)
+
+    def reproduction(self, ticks_per_day):
+        """Cases, the infections they caused and R (their mean) by day of infection.
+
+        R of a day is the case reproduction number of the agents infected that
+        day. The last days are low while their cases can still infect.
+        """
+        import pandas as pd
+        tick, infector, infectee = self.events()[:, :3].T
+        day = tick // ticks_per_day
+        days = int(day.max()) + 1 if len(day) else 0
+        secondary = np.bincount(infector[infector >= 0], minlength=int(infectee.max(initial=-1)) + 1)
+        cases = np.bincount(day, minlength=days)
+        caused = np.bincount(day, weights=secondary[infectee], minlength=days).astype(np.int64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r = np.where(cases > 0, caused / cases, np.nan)
+        return pd.DataFrame({"Cases": cases, "Secondary": caused, "R": r},
+                            index=pd.RangeIndex(days, name="Day"))
+
+    def export(self, path):
+        """Write the transmission tree, one edge per row, as Parquet, Arrow or CSV. Returns the path written."""
+        sink = open_sink(path, self.COLUMNS)
+        if self.count:
+            sink.write(self.events())
+        sink.close()
+        return sink.path
+
+    def get_state(self):
+        return {"size": self.size, "events": self.events().copy(), "dropped": self.dropped}
+
+    def set_state(self, state):
+        events = state["events"].reshape(-1, len(self.COLUMNS))
+        self.size = state["size"]
+        self.data = np.zeros((max(1, len(events), len(self.data)), len(self.COLUMNS)), dtype=np.int64)
+        self.data[:len(events)] = events
+        self.count = len(events)
+        self.dropped = state["dropped"]
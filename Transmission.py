@@ -0,0 +1,45 @@
+import numpy as np
+
+# Weight of a contact at distance d, in radii: 1 at d = 0 and at most 1 inside the radius
+KERNELS = {
+    "step": lambda d: np.ones_like(d),
+    "linear": lambda d: 1 - d,
+    # Three standard deviations at the radius
+    "gaussian": lambda d: np.exp(-4.5 * d * d),
+    "exponential": lambda d: np.exp(-3 * d),
+}
+
+
+class Transmission:
+    """Chance that a contact infects, evaluated for every candidate pair at once.
+
+    A pair is a susceptible agent and an infectious one closer than `radius`.
+    It transmits with probability * kernel(distance / radius) * susceptibility
+    of the susceptible agent's state, one uniform draw per pair in (candidate,
+    source) order, so a seed gives the same infections whatever engine found
+    the pairs. `kernel` is a name of KERNELS, `susceptibility` one factor per
+    state (every state 1 when None). The simulations take these arguments as
+    a dict, the transmission=None default keeps the deterministic overlap rule.
+    """
+
+    def __init__(self, probability=1.0, radius=10, kernel="step", susceptibility=None):
+        if kernel not in KERNELS:
+            raise ValueError(f"unknown kernel {kernel!r}, expected one of {sorted(KERNELS)}")
+        self.probability = probability
+        self.radius = radius
+        self.kernel = kernel
+        self.susceptibility = susceptibility
+
+    def chance(self, distance, state):
+        # Transmission probability of every pair of candidates in state
+        factor = 1.0 if self.susceptibility is None else self.susceptibility[state]
+        return self.probability * factor * KERNELS[self.kernel](np.asarray(distance) / self.radius)
+
+    def infect(self, rng, candidates, sources, distance, state):
+        """Candidates infected by at least one pair and the lowest source that infected each.
+
+        The pairs are those of grid_pairs, sorted by candidate then source.
+        """
+        transmitted = rng.random(len(candidates)) < self.chance(distance, state)
+        infected, first = np.unique(candidates[transmitted], return_index=True)
+        return infected, sources[transmitted][first]
@@ -0,0 +1,79 @@
+import numpy as np
+import pygame
+
+# Screen pixels per world unit at the closest zoom
+MAX_ZOOM = 8.0
+
+
+class Viewport:
+    """The part of a world shown in a screen area, panned and zoomed from the keyboard or mouse.
+
+    left, top is the world point at the area's top-left corner and zoom the
+    screen pixels per world unit. The view never leaves the world and zooming
+    out stops once all of it fits. W A S D or dragging pans, + and - or the
+    wheel zooms (around the pointer).
+    """
+
+    PAN = 64
+
+    def __init__(self, area, world_width, world_hight, zoom=1.0):
+        self.area = pygame.Rect(area)
+        self.world_width = world_width
+        self.world_hight = world_hight
+        self.min_zoom = min(1.0, self.area.width / world_width, self.area.height / world_hight)
+        self.zoom = zoom
+        self.left = self.top = 0.0
+        self.clamp()
+
+    def identity(self):
+        # The whole world at its corner, one screen pixel per unit: nothing to cull or scale
+        return (self.zoom == 1 and self.left == 0 and self.top == 0
+                and self.world_width <= self.area.width and self.world_hight <= self.area.height)
+
+    def bounds(self):
+        """World rect in view, as left, top, right, bottom."""
+        return (self.left, self.top,
+                self.left + self.area.width / self.zoom, self.top + self.area.height / self.zoom)
+
+    def to_screen(self, x, y):
+        return (self.area.left + np.floor((x - self.left) * self.zoom).astype(np.int64),
+                self.area.top + np.floor((y - self.top) * self.zoom).astype(np.int64))
+
+    def scale(self, size):
+        # Screen size of size world units, never below one pixel
+        return max(1, round(size * self.zoom))
+
+    def pan(self, dx, dy):
+        # Move the view by dx, dy screen pixels
+        self.left += dx / self.zoom
+        self.top += dy / self.zoom
+        self.clamp()
+
+    def zoom_at(self, factor, position):
+        # Zoom by factor keeping the world point under position (screen pixels) in place
+        px, py = position[0] - self.area.left, position[1] - self.area.top
+        x, y = self.left + px / self.zoom, self.top + py / self.zoom
+        self.zoom = min(max(self.zoom * factor, self.min_zoom), MAX_ZOOM)
+        self.left, self.top = x - px / self.zoom, y - py / self.zoom
+        self.clamp()
+
+    def clamp(self):
+        self.zoom = min(max(self.zoom, self.min_zoom), MAX_ZOOM)
+        self.left = min(max(self.left, 0.0), max(self.world_width - self.area.width / self.zoom, 0.0))
+        self.top = min(max(self.top, 0.0), max(self.world_hight - self.area.height / self.zoom, 0.0))
+
+    def control(self, event):
+        if event.type == pygame.KEYDOWN:
+            pan = {pygame.K_a: (-1, 0), pygame.K_d: (1, 0), pygame.K_w: (0, -1), pygame.K_s: (0, 1)}
+            if event.key in pan:
+                self.pan(pan[event.key][0] * self.PAN, pan[event.key][1] * self.PAN)
+            elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                self.zoom_at(2, self.area.center)
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                self.zoom_at(0.5, self.area.center)
+        elif event.type == pygame.MOUSEWHEEL:
+            position = pygame.mouse.get_pos()
+            if self.area.collidepoint(position):
+                self.zoom_at(1.25 ** event.y, position)
+        elif event.type == pygame.MOUSEMOTION and event.buttons[0] and self.area.collidepoint(event.pos):
+            self.pan(-event.rel[0], -event.rel[1])